@@ -3,23 +3,53 @@ Audit Log API Endpoints
 """
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+from typing import List, Optional, AsyncIterator
 from datetime import datetime
 
 from app.core.database import get_db
+from app.core.responses import PydanticResponse
 from app.schemas.audit import AuditLogResponse, AuditLogListResponse, AuditAction
-from app.services.audit_service import AuditService
+from app.services.audit_service import AuditService, encode_log_cursor, decode_log_cursor
 from app.security.dependencies import require_admin, get_current_user
 from app.models.user import User
 from app.models.audit_log import AuditAction as AuditActionModel
 
 router = APIRouter(prefix="/audit", tags=["Audit Logs"])
 
+# Validates a whole result list in one pydantic-core call
+_AUDIT_LOG_LIST_ADAPTER = TypeAdapter(List[AuditLogResponse])
+
+
+def _audit_log_list_response(logs) -> PydanticResponse:
+    """Serialize audit log rows straight to JSON bytes"""
+    return PydanticResponse(
+        _AUDIT_LOG_LIST_ADAPTER.validate_python(logs, from_attributes=True),
+        adapter=_AUDIT_LOG_LIST_ADAPTER
+    )
+
+
+async def _stream_audit_log_list(batches: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    """Serialize batches of audit log rows as one JSON array, batch by batch"""
+    yield b"["
+    first = True
+    async for logs in batches:
+        items = _AUDIT_LOG_LIST_ADAPTER.validate_python(logs, from_attributes=True)
+        if not items:
+            continue
+        if not first:
+            yield b","
+        yield _AUDIT_LOG_LIST_ADAPTER.dump_json(items)[1:-1]
+        first = False
+    yield b"]"
+
 
 @router.get(
     "/",
-    response_model=AuditLogListResponse,
+    response_class=PydanticResponse,
+    responses={200: {"model": AuditLogListResponse}},
     summary="Get audit logs (Admin only)"
 )
 async def get_audit_logs(
@@ -32,8 +62,9 @@ async def get_audit_logs(
     status: Optional[str] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get audit logs with filters.
@@ -47,6 +78,8 @@ async def get_audit_logs(
     - **start_date**: Filter from date
     - **end_date**: Filter to date
     - **status**: Filter by status (success, failed, error)
+    - **cursor**: `next_cursor` from the previous page (keyset pagination;
+      preferred over `skip` for deep pages)
     """
     audit_service = AuditService(db)
     
@@ -55,7 +88,7 @@ async def get_audit_logs(
     if action:
         model_action = AuditActionModel(action.value)
     
-    logs = audit_service.get_logs(
+    logs, total = await audit_service.get_logs(
         user_id=user_id,
         action=model_action,
         resource_type=resource_type,
@@ -64,56 +97,53 @@ async def get_audit_logs(
         end_date=end_date,
         status=status,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=decode_log_cursor(cursor) if cursor else None
     )
     
-    total = audit_service.get_logs_count(
-        user_id=user_id,
-        action=model_action,
-        resource_type=resource_type,
-        start_date=start_date,
-        end_date=end_date
-    )
-    
-    return AuditLogListResponse(
-        items=[AuditLogResponse.model_validate(log) for log in logs],
+    # Items are validated once by the adapter; the envelope needs no validation
+    return PydanticResponse(AuditLogListResponse.model_construct(
+        items=_AUDIT_LOG_LIST_ADAPTER.validate_python(logs, from_attributes=True),
         total=total,
         page=skip // limit + 1 if limit > 0 else 1,
-        size=limit
-    )
+        size=limit,
+        next_cursor=encode_log_cursor(logs[-1]) if len(logs) == limit else None
+    ))
 
 
 @router.get(
     "/my-activity",
-    response_model=List[AuditLogResponse],
+    response_class=PydanticResponse,
+    responses={200: {"model": List[AuditLogResponse]}},
     summary="Get my activity log"
 )
 async def get_my_activity(
     limit: int = Query(50, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current user's recent activity log.
     """
     audit_service = AuditService(db)
-    logs = audit_service.get_user_activity(
+    logs = await audit_service.get_user_activity(
         user_id=current_user.id,
         limit=limit
     )
     
-    return [AuditLogResponse.model_validate(log) for log in logs]
+    return _audit_log_list_response(logs)
 
 
 @router.get(
     "/file/{file_id}",
-    response_model=List[AuditLogResponse],
+    response_class=StreamingResponse,
+    responses={200: {"model": List[AuditLogResponse]}},
     summary="Get file audit history"
 )
 async def get_file_audit_history(
     file_id: int,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get complete audit history for a specific file.
@@ -121,21 +151,27 @@ async def get_file_audit_history(
     **Admin only endpoint.**
     """
     audit_service = AuditService(db)
-    logs = audit_service.get_file_history(file_id)
     
-    return [AuditLogResponse.model_validate(log) for log in logs]
+    # Streamed: hot files can have very long histories. The session stays open
+    # while the body is sent (FastAPI >= 0.118 closes yield dependencies after
+    # the response)
+    return StreamingResponse(
+        _stream_audit_log_list(audit_service.stream_file_history(file_id)),
+        media_type="application/json"
+    )
 
 
 @router.get(
     "/user/{user_id}",
-    response_model=List[AuditLogResponse],
+    response_class=PydanticResponse,
+    responses={200: {"model": List[AuditLogResponse]}},
     summary="Get user audit history (Admin only)"
 )
 async def get_user_audit_history(
     user_id: int,
     limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get audit history for a specific user.
@@ -143,9 +179,9 @@ async def get_user_audit_history(
     **Admin only endpoint.**
     """
     audit_service = AuditService(db)
-    logs = audit_service.get_user_activity(
+    logs = await audit_service.get_user_activity(
         user_id=user_id,
         limit=limit
     )
     
-    return [AuditLogResponse.model_validate(log) for log in logs]
+    return _audit_log_list_response(logs)
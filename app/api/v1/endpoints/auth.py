@@ -3,7 +3,7 @@ Authentication API Endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.schemas.auth import (
@@ -32,7 +32,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 async def register(
     register_data: RegisterRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(rate_limiter)
 ):
     """
@@ -45,7 +45,7 @@ async def register(
     Returns user info and JWT tokens.
     """
     auth_service = AuthService(db)
-    result = auth_service.register(register_data, request)
+    result = await auth_service.register(register_data, request)
     
     return {
         "message": "User registered successfully",
@@ -62,7 +62,7 @@ async def register(
 async def login(
     login_data: LoginRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(rate_limiter)
 ):
     """
@@ -74,7 +74,7 @@ async def login(
     Returns access token (20 min) and refresh token (7 days).
     """
     auth_service = AuthService(db)
-    result = auth_service.login(login_data, request)
+    result = await auth_service.login(login_data, request)
     
     return {
         "message": "Login successful",
@@ -91,7 +91,7 @@ async def login(
 async def refresh_token(
     refresh_data: RefreshTokenRequest,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a new access token using refresh token.
@@ -101,7 +101,7 @@ async def refresh_token(
     Returns new access and refresh tokens.
     """
     auth_service = AuthService(db)
-    tokens = auth_service.refresh_token(refresh_data.refresh_token, request)
+    tokens = await auth_service.refresh_token(refresh_data.refresh_token, request)
     
     return Token(**tokens)
 
@@ -114,7 +114,7 @@ async def refresh_token(
 async def logout(
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Logout current user.
@@ -122,7 +122,7 @@ async def logout(
     Logs the logout action in audit trail.
     """
     auth_service = AuthService(db)
-    auth_service.logout(current_user, request)
+    await auth_service.logout(current_user, request)
     
     return MessageResponse(message="Logged out successfully")
 
@@ -149,7 +149,7 @@ async def get_me(
 async def forgot_password(
     request_data: ForgotPasswordRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(rate_limiter)
 ):
     """
@@ -161,7 +161,7 @@ async def forgot_password(
     In production, this would send an email with reset instructions.
     """
     auth_service = AuthService(db)
-    auth_service.forgot_password(request_data.email, request)
+    await auth_service.forgot_password(request_data.email, request)
     
     return MessageResponse(
         message="If this email is registered, password reset instructions have been sent."
@@ -176,7 +176,7 @@ async def forgot_password(
 async def reset_password(
     request_data: ResetPasswordRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(rate_limiter)
 ):
     """
@@ -188,6 +188,6 @@ async def reset_password(
     Returns success message if password was reset.
     """
     auth_service = AuthService(db)
-    auth_service.reset_password(request_data.token, request_data.new_password, request)
+    await auth_service.reset_password(request_data.token, request_data.new_password, request)
     
     return MessageResponse(message="Password has been reset successfully.")
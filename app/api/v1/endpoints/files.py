@@ -3,11 +3,13 @@ File Management API Endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.responses import PydanticResponse
 from app.schemas.file import (
     FileUploadResponse,
     FileResponse,
@@ -15,6 +17,7 @@ from app.schemas.file import (
     FileUpdate,
     FilePermissionCreate,
     FilePermissionResponse,
+    FileDownloadURL,
     FileStats
 )
 from app.schemas.common import MessageResponse
@@ -29,6 +32,17 @@ from app.core.config import settings
 
 router = APIRouter(prefix="/files", tags=["Files"])
 
+# Validates a whole result list in one pydantic-core call
+_FILE_LIST_ADAPTER = TypeAdapter(List[FileListResponse])
+
+
+def _file_list_response(files) -> PydanticResponse:
+    """Serialize file rows straight to JSON bytes"""
+    return PydanticResponse(
+        _FILE_LIST_ADAPTER.validate_python(files, from_attributes=True),
+        adapter=_FILE_LIST_ADAPTER
+    )
+
 
 @router.post(
     "/upload",
@@ -41,7 +55,7 @@ async def upload_file(
     file: UploadFile = File(...),
     description: Optional[str] = None,
     current_user: User = Depends(require_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Upload a file to secure storage.
@@ -73,62 +87,65 @@ async def upload_file(
 
 @router.get(
     "/",
-    response_model=List[FileListResponse],
+    response_class=PydanticResponse,
+    responses={200: {"model": List[FileListResponse]}},
     summary="List my files"
 )
 async def list_my_files(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get list of files owned by current user.
     """
     file_service = FileService(db)
-    files = file_service.get_user_files(
+    files = await file_service.get_user_files(
         user_id=current_user.id,
         skip=skip,
         limit=limit
     )
     
-    return [FileListResponse.model_validate(f) for f in files]
+    return _file_list_response(files)
 
 
 @router.get(
     "/shared",
-    response_model=List[FileListResponse],
+    response_class=PydanticResponse,
+    responses={200: {"model": List[FileListResponse]}},
     summary="List files shared with me"
 )
 async def list_shared_files(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get list of files shared with current user.
     """
     file_service = FileService(db)
-    files = file_service.get_shared_files(
+    files = await file_service.get_shared_files(
         user_id=current_user.id,
         skip=skip,
         limit=limit
     )
     
-    return [FileListResponse.model_validate(f) for f in files]
+    return _file_list_response(files)
 
 
 @router.get(
     "/all",
-    response_model=List[FileListResponse],
+    response_class=PydanticResponse,
+    responses={200: {"model": List[FileListResponse]}},
     summary="List all files (Admin only)"
 )
 async def list_all_files(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get list of all files in the system.
@@ -136,9 +153,9 @@ async def list_all_files(
     **Admin only endpoint.**
     """
     file_service = FileService(db)
-    files = file_service.get_all_files(skip=skip, limit=limit)
+    files = await file_service.get_all_files(skip=skip, limit=limit)
     
-    return [FileListResponse.model_validate(f) for f in files]
+    return _file_list_response(files)
 
 
 @router.get(
@@ -148,22 +165,20 @@ async def list_all_files(
 )
 async def get_file_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get file statistics for current user.
     """
     file_service = FileService(db)
     
-    files = file_service.get_user_files(user_id=current_user.id, limit=1000)
-    total_size = sum(f.size for f in files)
-    
-    shared_files = file_service.get_shared_files(user_id=current_user.id, limit=1000)
+    total_files, total_size = await file_service.get_user_file_stats(current_user.id)
+    total_shared = await file_service.get_shared_files_count(current_user.id)
     
     return FileStats(
-        total_files=len(files),
+        total_files=total_files,
         total_size=total_size,
-        total_shared=len(shared_files)
+        total_shared=total_shared
     )
 
 
@@ -175,13 +190,15 @@ async def get_file_stats(
 async def get_file(
     file_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get file details by ID.
     """
     file_service = FileService(db)
-    file_record = file_service.get_file_by_id(file_id)
+    file_record, has_permission = await file_service.get_file_with_access(
+        file_id, current_user.id
+    )
     
     if not file_record:
         raise HTTPException(
@@ -190,19 +207,16 @@ async def get_file(
         )
     
     # Check access
-    if file_record.owner_id != current_user.id:
-        if not current_user.role or current_user.role.name != "admin":
-            # Check permissions
-            permissions = file_service.get_file_permissions(file_id)
-            has_access = any(p.user_id == current_user.id for p in permissions)
-            if not has_access:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="You don't have access to this file"
-                )
+    if file_record.owner_id != current_user.id and not has_permission:
+        if not current_user.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have access to this file"
+            )
     
+    owner = file_record.owner
     response = FileResponse.model_validate(file_record)
-    response.owner_email = file_record.owner.email if file_record.owner else None
+    response.owner_email = owner.email if owner else None
     return response
 
 
@@ -214,15 +228,25 @@ async def download_file(
     file_id: int,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Download a file by ID.
     
-    Streams file directly from S3 through the backend.
+    Redirects to a short-lived presigned S3 URL, or streams the file
+    through the backend when presigned downloads are disabled.
     """
     file_service = FileService(db)
-    file_stream, filename, content_type = file_service.download_file(
+    
+    if settings.S3_PRESIGNED_DOWNLOADS:
+        url = await file_service.get_download_url(
+            file_id=file_id,
+            user=current_user,
+            request=request
+        )
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    
+    file_stream, filename, content_type, size = await file_service.download_file(
         file_id=file_id,
         user=current_user,
         request=request
@@ -232,11 +256,39 @@ async def download_file(
         file_stream,
         media_type=content_type,
         headers={
-            "Content-Disposition": f'attachment; filename="{filename}"'
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(size)
         }
     )
 
 
+@router.get(
+    "/{file_id}/download-url",
+    response_model=FileDownloadURL,
+    summary="Get a presigned download URL"
+)
+async def get_download_url(
+    file_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a short-lived presigned S3 URL for a file.
+    
+    For clients that cannot follow the redirect from /download
+    (e.g. fetch() calls that need to hand the URL to the browser).
+    """
+    file_service = FileService(db)
+    url = await file_service.get_download_url(
+        file_id=file_id,
+        user=current_user,
+        request=request
+    )
+    
+    return FileDownloadURL(url=url, expires_in=settings.S3_PRESIGNED_URL_EXPIRE_SECONDS)
+
+
 @router.put(
     "/{file_id}",
     response_model=FileResponse,
@@ -247,13 +299,13 @@ async def update_file(
     file_data: FileUpdate,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update file metadata (filename, description).
     """
     file_service = FileService(db)
-    file_record = file_service.update_file(
+    file_record = await file_service.update_file(
         file_id=file_id,
         file_data=file_data,
         user=current_user,
@@ -272,13 +324,13 @@ async def delete_file(
     file_id: int,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a file (soft delete).
     """
     file_service = FileService(db)
-    file_service.delete_file(
+    await file_service.delete_file(
         file_id=file_id,
         user=current_user,
         request=request
@@ -300,7 +352,7 @@ async def grant_permission(
     permission_data: FilePermissionCreate,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Grant permission on a file to another user.
@@ -311,15 +363,16 @@ async def grant_permission(
     - **can_share**: Allow re-sharing
     """
     file_service = FileService(db)
-    permission = file_service.grant_permission(
+    permission = await file_service.grant_permission(
         file_id=file_id,
         permission_data=permission_data,
         granting_user=current_user,
         request=request
     )
     
+    permission_user = await permission.awaitable_attrs.user
     response = FilePermissionResponse.model_validate(permission)
-    response.user_email = permission.user.email if permission.user else None
+    response.user_email = permission_user.email if permission_user else None
     return response
 
 
@@ -331,13 +384,13 @@ async def grant_permission(
 async def list_permissions(
     file_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all permissions for a file.
     """
     file_service = FileService(db)
-    file_record = file_service.get_file_by_id(file_id)
+    file_record = await file_service.get_file_by_id(file_id)
     
     if not file_record:
         raise HTTPException(
@@ -347,13 +400,13 @@ async def list_permissions(
     
     # Check ownership
     if file_record.owner_id != current_user.id:
-        if not current_user.role or current_user.role.name != "admin":
+        if not current_user.is_admin:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have permission to view file permissions"
             )
     
-    permissions = file_service.get_file_permissions(file_id)
+    permissions = await file_service.get_file_permissions(file_id)
     
     return [
         FilePermissionResponse(
@@ -381,13 +434,13 @@ async def revoke_permission(
     user_id: int,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Revoke permission from a user for a file.
     """
     file_service = FileService(db)
-    file_service.revoke_permission(
+    await file_service.revoke_permission(
         file_id=file_id,
         user_id=user_id,
         revoking_user=current_user,
@@ -3,8 +3,10 @@ Health Check API Endpoint
 """
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from time import monotonic
 
 from app.core.database import get_db
 from app.core.redis import redis_client
@@ -13,6 +15,22 @@ from app.schemas.common import HealthCheck
 
 router = APIRouter(tags=["Health"])
 
+_SELECT1 = text("SELECT 1")
+
+# Frequent liveness probes reuse a recent successful Redis ping
+REDIS_PING_CACHE_SECONDS = 2.0
+_redis_last_ok: float = float("-inf")
+
+
+async def _redis_healthy() -> bool:
+    """Ping Redis unless a ping succeeded within the cache window"""
+    global _redis_last_ok
+    if monotonic() - _redis_last_ok < REDIS_PING_CACHE_SECONDS:
+        return True
+    await redis_client.client.ping()
+    _redis_last_ok = monotonic()
+    return True
+
 
 @router.get(
     "/health",
@@ -26,7 +44,7 @@ async def health_check():
     return HealthCheck(
         status="healthy",
         version=settings.APP_VERSION,
-        timestamp=datetime.utcnow()
+        timestamp=datetime.now(timezone.utc)
     )
 
 
@@ -35,7 +53,7 @@ async def health_check():
     summary="Detailed health check"
 )
 async def detailed_health_check(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Detailed health check including database and Redis connectivity.
@@ -43,13 +61,13 @@ async def detailed_health_check(
     health = {
         "status": "healthy",
         "version": settings.APP_VERSION,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
         "services": {}
     }
     
     # Check database
     try:
-        db.execute("SELECT 1")
+        await db.execute(_SELECT1)
         health["services"]["database"] = {"status": "healthy"}
     except Exception as e:
         health["services"]["database"] = {"status": "unhealthy", "error": str(e)}
@@ -57,7 +75,7 @@ async def detailed_health_check(
     
     # Check Redis
     try:
-        redis_client.client.ping()
+        await _redis_healthy()
         health["services"]["redis"] = {"status": "healthy"}
     except Exception as e:
         health["services"]["redis"] = {"status": "unhealthy", "error": str(e)}
@@ -3,11 +3,14 @@ Share Link API Endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.responses import PydanticResponse
+from app.core.config import settings
 from app.core.s3 import s3_service
 from app.schemas.share import (
     ShareLinkCreate,
@@ -18,12 +21,23 @@ from app.schemas.share import (
 from app.schemas.common import MessageResponse
 from app.services.share_service import ShareLinkService
 from app.services.audit_service import AuditService
-from app.security.dependencies import get_current_user, require_user
+from app.security.dependencies import get_current_user, get_optional_user, require_user
 from app.models.user import User
 from app.models.audit_log import AuditAction
 
 router = APIRouter(prefix="/share", tags=["Share Links"])
 
+# Reads filename and has_password straight off the ORM rows
+_SHARE_LINK_LIST_ADAPTER = TypeAdapter(List[ShareLinkListResponse])
+
+
+def _share_link_list_response(links) -> PydanticResponse:
+    """Serialize share link rows straight to JSON bytes"""
+    return PydanticResponse(
+        _SHARE_LINK_LIST_ADAPTER.validate_python(links, from_attributes=True),
+        adapter=_SHARE_LINK_LIST_ADAPTER
+    )
+
 
 @router.post(
     "/",
@@ -35,7 +49,7 @@ async def create_share_link(
     link_data: ShareLinkCreate,
     request: Request,
     current_user: User = Depends(require_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create an expiring share link for a file.
@@ -49,7 +63,7 @@ async def create_share_link(
     Share link data is stored in Redis with TTL.
     """
     share_service = ShareLinkService(db)
-    result = share_service.create_share_link(
+    result = await share_service.create_share_link(
         link_data=link_data,
         user=current_user,
         request=request
@@ -65,7 +79,7 @@ async def create_share_link(
 )
 async def get_share_link_info(
     token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get information about a share link.
@@ -74,7 +88,7 @@ async def get_share_link_info(
     Does not require authentication.
     """
     share_service = ShareLinkService(db)
-    return share_service.get_share_link_info(token)
+    return await share_service.get_share_link_info(token)
 
 
 @router.get(
@@ -85,7 +99,8 @@ async def download_via_share_link(
     token: str,
     request: Request,
     password: Optional[str] = None,
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Download a file using a share link.
@@ -93,35 +108,36 @@ async def download_via_share_link(
     - Validates link expiration (Redis TTL)
     - Checks download limits
     - Verifies password if required
-    - Streams file through backend
+    - Redirects to a presigned S3 URL (or streams through backend)
     
     Authentication is optional unless link requires it.
     """
     share_service = ShareLinkService(db)
     
-    # Try to get current user (optional)
-    current_user = None
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
-        from app.security.jwt import verify_access_token
-        token_str = auth_header.split(" ")[1]
-        payload = verify_access_token(token_str)
-        if payload:
-            user_id = payload.get("sub")
-            if user_id:
-                current_user = db.query(User).filter(User.id == int(user_id)).first()
-    
     # Get file info via share link
-    file_info = share_service.download_via_share_link(
+    file_info = await share_service.download_via_share_link(
         token=token,
         password=password,
         user=current_user,
         request=request
     )
     
+    if settings.S3_PRESIGNED_DOWNLOADS:
+        url = s3_service.generate_presigned_url(
+            file_info["s3_key"],
+            file_info["filename"],
+            file_info["content_type"]
+        )
+        if url is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to retrieve file"
+            )
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    
     # Get file stream from S3
-    file_stream = s3_service.get_file_stream(file_info["s3_key"])
-    if not file_stream:
+    file_stream = await s3_service.get_file_chunks(file_info["s3_key"], file_info["size"])
+    if file_stream is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve file"
@@ -131,7 +147,8 @@ async def download_via_share_link(
         file_stream,
         media_type=file_info["content_type"],
         headers={
-            "Content-Disposition": f'attachment; filename="{file_info["filename"]}"'
+            "Content-Disposition": f'attachment; filename="{file_info["filename"]}"',
+            "Content-Length": str(file_info["size"])
         }
     )
 
@@ -145,7 +162,7 @@ async def revoke_share_link(
     token: str,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Revoke/delete a share link.
@@ -153,7 +170,7 @@ async def revoke_share_link(
     Only the creator or admin can revoke a link.
     """
     share_service = ShareLinkService(db)
-    share_service.revoke_share_link(
+    await share_service.revoke_share_link(
         token=token,
         user=current_user,
         request=request
@@ -164,30 +181,18 @@ async def revoke_share_link(
 
 @router.get(
     "/",
-    response_model=List[ShareLinkListResponse],
+    response_class=PydanticResponse,
+    responses={200: {"model": List[ShareLinkListResponse]}},
     summary="List my share links"
 )
 async def list_my_share_links(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all share links created by current user.
     """
     share_service = ShareLinkService(db)
-    links = share_service.get_user_share_links(current_user.id)
+    links = await share_service.get_user_share_links(current_user.id)
     
-    return [
-        ShareLinkListResponse(
-            id=link.id,
-            token=link.token,
-            file_id=link.file_id,
-            filename=link.file.filename if link.file else "Unknown",
-            expires_at=link.expires_at,
-            is_active=link.is_active,
-            download_count=link.download_count,
-            max_downloads=link.max_downloads,
-            created_at=link.created_at
-        )
-        for link in links
-    ]
+    return _share_link_list_response(links)
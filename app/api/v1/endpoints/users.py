@@ -3,10 +3,13 @@ User Management API Endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
 from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.responses import PydanticResponse
 from app.schemas.user import (
     UserResponse,
     UserListResponse,
@@ -18,6 +21,12 @@ from app.schemas.user import (
 )
 from app.schemas.common import MessageResponse
 from app.services.user_service import UserService
+from app.services.role_cache import (
+    get_role_id,
+    get_cached_roles,
+    cache_roles,
+    invalidate_roles
+)
 from app.security.dependencies import (
     get_current_user,
     require_admin,
@@ -28,10 +37,34 @@ from app.models.role import Role
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+_USER_LIST_ADAPTER = TypeAdapter(List[UserListResponse])
+_ROLE_LIST_ADAPTER = TypeAdapter(List[RoleResponse])
+
+
+def _user_response(user: User) -> PydanticResponse:
+    """Serialize a DB-loaded user without re-validating it"""
+    role = user.role
+    return PydanticResponse(UserResponse.model_construct(
+        id=user.id,
+        email=user.email,
+        full_name=user.full_name,
+        is_active=user.is_active,
+        is_verified=user.is_verified,
+        role=RoleResponse.model_construct(
+            id=role.id,
+            name=role.name,
+            description=role.description,
+            created_at=role.created_at
+        ) if role else None,
+        created_at=user.created_at,
+        updated_at=user.updated_at
+    ))
+
 
 @router.get(
     "/",
-    response_model=List[UserListResponse],
+    response_class=PydanticResponse,
+    responses={200: {"model": List[UserListResponse]}},
     summary="List all users (Admin only)"
 )
 async def list_users(
@@ -39,7 +72,7 @@ async def list_users(
     limit: int = Query(100, ge=1, le=100),
     is_active: Optional[bool] = None,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get list of all users.
@@ -51,30 +84,24 @@ async def list_users(
     - **is_active**: Filter by active status
     """
     user_service = UserService(db)
-    users = user_service.get_users(skip=skip, limit=limit, is_active=is_active)
+    users = await user_service.get_users(skip=skip, limit=limit, is_active=is_active)
     
-    return [
-        UserListResponse(
-            id=user.id,
-            email=user.email,
-            full_name=user.full_name,
-            is_active=user.is_active,
-            role_name=user.role.name if user.role else None,
-            created_at=user.created_at
-        )
-        for user in users
-    ]
+    return PydanticResponse(
+        _USER_LIST_ADAPTER.validate_python([dict(user) for user in users]),
+        adapter=_USER_LIST_ADAPTER
+    )
 
 
 @router.get(
     "/{user_id}",
-    response_model=UserResponse,
+    response_class=PydanticResponse,
+    responses={200: {"model": UserResponse}},
     summary="Get user by ID"
 )
 async def get_user(
     user_id: int,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get user details by ID.
@@ -82,7 +109,7 @@ async def get_user(
     **Admin only endpoint.**
     """
     user_service = UserService(db)
-    user = user_service.get_user_by_id(user_id)
+    user = await user_service.get_user_by_id(user_id)
     
     if not user:
         raise HTTPException(
@@ -90,18 +117,19 @@ async def get_user(
             detail="User not found"
         )
     
-    return UserResponse.model_validate(user)
+    return _user_response(user)
 
 
 @router.put(
     "/me",
-    response_model=UserResponse,
+    response_class=PydanticResponse,
+    responses={200: {"model": UserResponse}},
     summary="Update current user"
 )
 async def update_me(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update current user's information.
@@ -109,21 +137,22 @@ async def update_me(
     - **full_name**: Update display name
     """
     user_service = UserService(db)
-    updated_user = user_service.update_user(current_user.id, user_data)
+    updated_user = await user_service.update_user(current_user.id, user_data)
     
-    return UserResponse.model_validate(updated_user)
+    return _user_response(updated_user)
 
 
 @router.put(
     "/{user_id}",
-    response_model=UserResponse,
+    response_class=PydanticResponse,
+    responses={200: {"model": UserResponse}},
     summary="Update user (Admin only)"
 )
 async def update_user(
     user_id: int,
     user_data: UserUpdate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update any user's information.
@@ -131,21 +160,22 @@ async def update_user(
     **Admin only endpoint.**
     """
     user_service = UserService(db)
-    updated_user = user_service.update_user(user_id, user_data)
+    updated_user = await user_service.update_user(user_id, user_data)
     
-    return UserResponse.model_validate(updated_user)
+    return _user_response(updated_user)
 
 
 @router.put(
     "/{user_id}/role",
-    response_model=UserResponse,
+    response_class=PydanticResponse,
+    responses={200: {"model": UserResponse}},
     summary="Assign role to user (Admin only)"
 )
 async def assign_role(
     user_id: int,
     role_data: UserRoleUpdate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Assign a role to a user.
@@ -155,9 +185,9 @@ async def assign_role(
     - **role_id**: ID of the role to assign
     """
     user_service = UserService(db)
-    updated_user = user_service.update_user_role(user_id, role_data, current_user)
+    updated_user = await user_service.update_user_role(user_id, role_data, current_user)
     
-    return UserResponse.model_validate(updated_user)
+    return _user_response(updated_user)
 
 
 @router.post(
@@ -168,7 +198,7 @@ async def assign_role(
 async def change_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Change current user's password.
@@ -177,7 +207,7 @@ async def change_password(
     - **new_password**: New password (min 8 chars)
     """
     user_service = UserService(db)
-    user_service.change_password(
+    await user_service.change_password(
         current_user.id,
         password_data.current_password,
         password_data.new_password
@@ -194,7 +224,7 @@ async def change_password(
 async def deactivate_user(
     user_id: int,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Deactivate a user account (soft delete).
@@ -208,7 +238,7 @@ async def deactivate_user(
         )
     
     user_service = UserService(db)
-    user_service.delete_user(user_id)
+    await user_service.delete_user(user_id)
     
     return MessageResponse(message="User deactivated successfully")
 
@@ -217,20 +247,31 @@ async def deactivate_user(
 
 @router.get(
     "/roles/list",
-    response_model=List[RoleResponse],
+    response_class=PydanticResponse,
+    responses={200: {"model": List[RoleResponse]}},
     summary="List all roles"
 )
 async def list_roles(
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get list of all available roles.
     
     **Admin only endpoint.**
     """
-    roles = db.query(Role).all()
-    return [RoleResponse.model_validate(role) for role in roles]
+    roles = await get_cached_roles()
+    if roles is None:
+        result = await db.execute(
+            select(Role.id, Role.name, Role.description, Role.created_at)
+        )
+        roles = [dict(row) for row in result.mappings()]
+        await cache_roles(roles)
+    
+    return PydanticResponse(
+        _ROLE_LIST_ADAPTER.validate_python(roles),
+        adapter=_ROLE_LIST_ADAPTER
+    )
 
 
 @router.post(
@@ -242,7 +283,7 @@ async def list_roles(
 async def create_role(
     role_data: RoleCreate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new role.
@@ -250,8 +291,7 @@ async def create_role(
     **Admin only endpoint.**
     """
     # Check if role exists
-    existing = db.query(Role).filter(Role.name == role_data.name).first()
-    if existing:
+    if await get_role_id(db, role_data.name) is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Role already exists"
@@ -259,7 +299,8 @@ async def create_role(
     
     role = Role(name=role_data.name, description=role_data.description)
     db.add(role)
-    db.commit()
-    db.refresh(role)
+    await db.commit()
+    await db.refresh(role)
+    await invalidate_roles()
     
     return RoleResponse.model_validate(role)
@@ -5,7 +5,7 @@ Loads all configuration from environment variables
 
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import Optional, List
 from functools import lru_cache
 
 
@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
     API_V1_PREFIX: str = "/api/v1"
+    CORS_ORIGINS: str = ""  # Comma-separated; empty skips CORS (same-origin / proxied frontend)
     
     # PostgreSQL Database
     POSTGRES_HOST: str = "localhost"
@@ -25,28 +26,57 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str = "SECUREFILE_SHARING_APPLICATION"
     DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Recycle before server/proxy idle timeouts
+    DB_POOL_TIMEOUT_SECONDS: int = 10  # Max wait for a free connection before erroring
+    DB_POOL_PRE_PING: bool = True  # Test each connection on checkout (one extra round trip)
+    DB_PGBOUNCER: bool = False  # Behind PgBouncer in transaction mode: no server-side statement caching
     
     # Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_URL: Optional[str] = None
+    REDIS_MAX_CONNECTIONS: int = 50
     
     # AWS S3
     AWS_ACCESS_KEY_ID: str
     AWS_SECRET_ACCESS_KEY: str
     AWS_REGION: str = "ap-south-2"
     S3_BUCKET_NAME: str
+    # Server-wide: True answers downloads with a 307 to a presigned S3 URL, which
+    # browser (XHR) downloads can only follow if the bucket allows CORS
+    S3_PRESIGNED_DOWNLOADS: bool = False
+    S3_PRESIGNED_URL_EXPIRE_SECONDS: int = 300
     
     # JWT Configuration
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 20
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    JWT_CACHE_SIZE: int = 10_000  # Verified access tokens kept in-process, 0 disables
+    PASSWORD_CACHE_SIZE: int = 0  # Recent successful password checks kept in-process, 0 disables
     
     # File Upload Configuration
     MAX_FILE_SIZE_MB: int = 200
     MAX_FILE_SIZE_BYTES: int = 209715200  # 200 * 1024 * 1024
     
+    # Redis caches, 0 disables
+    USER_CACHE_TTL_SECONDS: int = 30
+    ROLES_CACHE_TTL_SECONDS: int = 3600  # Role listing; dropped when a role is created
+    
+    # Audit Logging
+    AUDIT_LOG_BATCHING: bool = True  # Write audit entries from a background queue
+    AUDIT_LOG_QUEUE: str = "memory"  # "memory" (per worker) or "redis" (shared across workers)
+    AUDIT_LOG_QUEUE_SIZE: int = 10_000  # In-memory queue bound; entries past it are written inline
+    AUDIT_LOG_BATCH_SIZE: int = 500  # Max rows per INSERT
+    AUDIT_LOG_FLUSH_INTERVAL_MS: int = 100  # Max time an entry waits for its batch
+    AUDIT_LOG_DB_POOL_SIZE: int = 2  # Connections reserved for the audit writer (own pool)
+    AUDIT_LOG_EXACT_COUNT_MAX: int = 100_000  # Unfiltered listings past this report the planner's estimate
+    
+    # Adds X-Process-Time (seconds) to every response
+    PROCESS_TIME_HEADER: bool = True
+    
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
@@ -54,6 +84,11 @@ class Settings(BaseSettings):
     ADMIN_EMAIL: str = "admin@securefile.com"
     ADMIN_PASSWORD: str = "AbhiMH33"
     
+    @property
+    def cors_origins(self) -> List[str]:
+        """Allowed CORS origins"""
+        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
+    
     @property
     def database_url(self) -> str:
         """Construct database URL from components"""
@@ -61,6 +96,15 @@ class Settings(BaseSettings):
             return self.DATABASE_URL
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
+    @property
+    def async_database_url(self) -> str:
+        """Database URL for the async engine (asyncpg driver)"""
+        url = self.database_url
+        for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+            if url.startswith(prefix):
+                return "postgresql+asyncpg://" + url[len(prefix):]
+        return url
+    
     @property
     def redis_url(self) -> str:
         """Construct Redis URL from components"""
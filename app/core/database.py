@@ -2,44 +2,107 @@
 Database Connection and Session Management
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.ext.asyncio import (
+    AsyncAttrs,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import DeclarativeBase
+from typing import AsyncGenerator, Dict, Any
+import uuid
 
 from app.core.config import settings
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+
+def _connect_args() -> Dict[str, Any]:
+    """
+    asyncpg connection arguments
+    
+    In PgBouncer transaction mode consecutive statements may run on
+    different server connections, so prepared statements must not be
+    cached or reuse names across them.
+    """
+    if not settings.DB_PGBOUNCER:
+        return {}
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__"
+    }
+
+
+# Create async database engine (asyncpg driver)
+engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    # Reuse the most recent connection: a warm core set stays busy and
+    # connections idle past pool_recycle are the ones that get replaced
+    pool_use_lifo=True,
+    connect_args=_connect_args(),
     echo=settings.DEBUG
 )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create async session factory
+SessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Separate small pool for the background audit writer, so batch inserts
+# never queue behind (or time out waiting for) request connections
+audit_engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_size=settings.AUDIT_LOG_DB_POOL_SIZE,
+    max_overflow=0,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    connect_args=_connect_args(),
+    echo=settings.DEBUG
+)
+
+AuditSessionLocal = async_sessionmaker(
+    bind=audit_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+class Base(AsyncAttrs, DeclarativeBase):
+    """Declarative base for models (supports awaitable lazy attributes)"""
+    pass
+
 
-# Create declarative base for models
-Base = declarative_base()
+def dialect_insert(db: AsyncSession, model):
+    """INSERT for the session's dialect (supports ON CONFLICT clauses)"""
+    if db.bind.dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return pg_insert(model)
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Database session dependency
-    Yields a database session and ensures it's closed after use
+    Yields an async database session and ensures it's closed after use
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def init_db() -> None:
+async def init_db() -> None:
     """
     Initialize database - create all tables
     Should be called on application startup
     """
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
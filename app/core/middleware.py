@@ -0,0 +1,35 @@
+"""
+ASGI Middleware
+"""
+
+from time import perf_counter_ns
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ProcessTimeMiddleware:
+    """
+    Add an X-Process-Time header (seconds until the response starts)
+    
+    Plain ASGI rather than @app.middleware("http"), which wraps every
+    response body in an extra task and memory stream.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = perf_counter_ns()
+        
+        async def send_with_time(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed = (perf_counter_ns() - start) / 1e9
+                MutableHeaders(scope=message).append("X-Process-Time", f"{elapsed:.6f}")
+            await send(message)
+        
+        await self.app(scope, receive, send_with_time)
@@ -3,103 +3,260 @@ Redis Connection and Cache Management
 """
 
 import redis.asyncio as aioredis
-import redis
-from typing import Optional
-import json
+from typing import Optional, List
+import orjson
+import time
 from datetime import timedelta
 
 from app.core.config import settings
+from app.utils.logging import get_logger
+
+
+logger = get_logger("redis")
+
+# Token bucket: refill by elapsed time, take `cost` tokens if available.
+# KEYS[1] = bucket key
+# ARGV = capacity, refill rate (tokens/ms), now (ms), cost
+# Returns 1 if allowed, 0 if rate limited.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1000)
+return allowed
+"""
+
+# Fixed-window counter: INCR and set the expiry on the first hit.
+# KEYS[1] = counter key
+# ARGV[1] = expiry in seconds (0 = no expiry)
+# Returns the new count.
+INCR_EXPIRE_LUA = """
+local count = redis.call('INCR', KEYS[1])
+local expiry = tonumber(ARGV[1])
+if count == 1 and expiry > 0 then
+    redis.call('EXPIRE', KEYS[1], expiry)
+end
+return count
+"""
+
+# Claim one download on a JSON share-link record, keeping its TTL.
+# KEYS[1] = share link key
+# Returns the new download count, 0 if the limit is reached, -1 if missing.
+SHARE_DOWNLOAD_LUA = """
+local raw = redis.call('GET', KEYS[1])
+if not raw then
+    return -1
+end
+
+local data = cjson.decode(raw)
+local count = tonumber(data['download_count']) or 0
+local max_downloads = tonumber(data['max_downloads'])
+if max_downloads and max_downloads > 0 and count >= max_downloads then
+    return 0
+end
+
+data['download_count'] = count + 1
+redis.call('SET', KEYS[1], cjson.encode(data), 'KEEPTTL')
+return count + 1
+"""
 
 
 class RedisClient:
-    """Synchronous Redis client wrapper"""
+    """Asyncio Redis client wrapper (one connection pool per process)"""
     
     def __init__(self):
-        self._client: Optional[redis.Redis] = None
+        self._client: Optional[aioredis.Redis] = None
+        self._incr_expire = None
+        self._token_bucket = None
+        self._share_download = None
     
-    def connect(self) -> redis.Redis:
-        """Create Redis connection"""
+    def connect(self) -> aioredis.Redis:
+        """
+        Create the Redis connection pool and register Lua scripts
+        
+        Connections are opened lazily, on the event loop that first uses them,
+        so call this from the application lifespan.
+        """
         if self._client is None:
-            self._client = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                db=0,
-                decode_responses=True
+            self._client = aioredis.Redis(
+                connection_pool=aioredis.ConnectionPool(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    db=0,
+                    decode_responses=True,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS
+                )
             )
+            self._incr_expire = self._client.register_script(INCR_EXPIRE_LUA)
+            self._token_bucket = self._client.register_script(TOKEN_BUCKET_LUA)
+            self._share_download = self._client.register_script(SHARE_DOWNLOAD_LUA)
         return self._client
     
     @property
-    def client(self) -> redis.Redis:
+    def client(self) -> aioredis.Redis:
         """Get Redis client instance"""
         if self._client is None:
             self.connect()
         return self._client
     
-    def close(self):
-        """Close Redis connection"""
+    async def close(self):
+        """Close Redis connection pool"""
         if self._client:
-            self._client.close()
+            await self._client.aclose(close_connection_pool=True)
             self._client = None
+            self._incr_expire = None
+            self._token_bucket = None
+            self._share_download = None
     
-    def set_with_expiry(self, key: str, value: dict, expiry_seconds: int) -> bool:
-        """Set a key with expiration time"""
+    async def set_with_expiry(self, key: str, value: dict, expiry_seconds: int) -> bool:
+        """Set a key with expiration time (JSON via orjson, datetimes as ISO 8601)"""
         try:
-            self.client.setex(
+            await self.client.setex(
                 name=key,
                 time=expiry_seconds,
-                value=json.dumps(value)
+                value=orjson.dumps(value)
             )
             return True
         except Exception as e:
-            print(f"Redis SET error: {e}")
+            logger.error("Redis SET error: %s", e)
             return False
     
-    def get(self, key: str) -> Optional[dict]:
+    async def get(self, key: str) -> Optional[dict]:
         """Get value by key"""
         try:
-            value = self.client.get(key)
+            value = await self.client.get(key)
             if value:
-                return json.loads(value)
+                return orjson.loads(value)
             return None
         except Exception as e:
-            print(f"Redis GET error: {e}")
+            logger.error("Redis GET error: %s", e)
             return None
     
-    def delete(self, key: str) -> bool:
+    async def delete(self, key: str) -> bool:
         """Delete a key"""
         try:
-            self.client.delete(key)
+            await self.client.delete(key)
             return True
         except Exception as e:
-            print(f"Redis DELETE error: {e}")
+            logger.error("Redis DELETE error: %s", e)
             return False
     
-    def exists(self, key: str) -> bool:
+    async def exists(self, key: str) -> bool:
         """Check if key exists"""
         try:
-            return self.client.exists(key) > 0
+            return await self.client.exists(key) > 0
         except Exception as e:
-            print(f"Redis EXISTS error: {e}")
+            logger.error("Redis EXISTS error: %s", e)
             return False
     
-    def get_ttl(self, key: str) -> int:
+    async def get_ttl(self, key: str) -> int:
         """Get remaining TTL for a key in seconds"""
         try:
-            return self.client.ttl(key)
+            return await self.client.ttl(key)
         except Exception as e:
-            print(f"Redis TTL error: {e}")
+            logger.error("Redis TTL error: %s", e)
             return -1
     
-    def increment(self, key: str, expiry_seconds: Optional[int] = None) -> int:
-        """Increment a counter with optional expiry"""
+    async def push_json(self, key: str, value: dict) -> bool:
+        """Append a JSON value to the tail of a list"""
         try:
-            count = self.client.incr(key)
-            if expiry_seconds and count == 1:
-                self.client.expire(key, expiry_seconds)
-            return count
+            await self.client.rpush(key, orjson.dumps(value))
+            return True
         except Exception as e:
-            print(f"Redis INCR error: {e}")
+            logger.error("Redis RPUSH error: %s", e)
+            return False
+    
+    async def push_json_many(self, key: str, values: List[dict]) -> bool:
+        """Append several JSON values to the tail of a list in one RPUSH"""
+        if not values:
+            return True
+        try:
+            await self.client.rpush(key, *(orjson.dumps(value) for value in values))
+            return True
+        except Exception as e:
+            logger.error("Redis RPUSH error: %s", e)
+            return False
+    
+    async def pop_json(self, key: str, count: int) -> List[dict]:
+        """Atomically pop up to ``count`` JSON values from the head of a list"""
+        try:
+            values = await self.client.lpop(key, count)
+            return [orjson.loads(value) for value in values or []]
+        except Exception as e:
+            logger.error("Redis LPOP error: %s", e)
+            return []
+    
+    async def increment(self, key: str, expiry_seconds: Optional[int] = None) -> int:
+        """Increment a counter with optional expiry in one atomic round trip"""
+        try:
+            if self._incr_expire is None:
+                self.connect()
+            return await self._incr_expire(keys=[key], args=[expiry_seconds or 0])
+        except Exception as e:
+            logger.error("Redis INCR error: %s", e)
             return 0
+    
+    async def consume_token(
+        self,
+        key: str,
+        capacity: int,
+        refill_per_second: float,
+        cost: int = 1
+    ) -> bool:
+        """
+        Take tokens from a token bucket in one atomic round trip
+        
+        Returns:
+            True if allowed (also when Redis is unavailable), False if limited
+        """
+        try:
+            if self._token_bucket is None:
+                self.connect()
+            allowed = await self._token_bucket(
+                keys=[key],
+                args=[capacity, refill_per_second / 1000.0, int(time.time() * 1000), cost]
+            )
+            return allowed == 1
+        except Exception as e:
+            logger.error("Redis EVALSHA error: %s", e)
+            return True
+    
+    async def claim_download(self, key: str) -> Optional[int]:
+        """
+        Atomically check the download limit of a share link record and
+        increment its download_count in one round trip
+        
+        Returns:
+            New download count, 0 if the limit is reached, None if the
+            key is missing or Redis is unavailable
+        """
+        try:
+            if self._share_download is None:
+                self.connect()
+            count = await self._share_download(keys=[key])
+            return None if count < 0 else count
+        except Exception as e:
+            logger.error("Redis EVALSHA error: %s", e)
+            return None
 
 
 # Global Redis client instance
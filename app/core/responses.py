@@ -0,0 +1,35 @@
+"""
+Response Classes
+"""
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from starlette.background import BackgroundTask
+from typing import Any, Mapping, Optional
+
+
+class PydanticResponse(JSONResponse):
+    """
+    JSON response rendered by pydantic-core
+    
+    Takes a model instance and serializes it with ``model_dump_json``,
+    or any value together with the TypeAdapter that dumps it, bypassing
+    ``jsonable_encoder`` and response_model validation.
+    """
+    
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+        adapter: Optional[TypeAdapter] = None
+    ):
+        self.adapter = adapter
+        super().__init__(content, status_code, headers, media_type, background)
+    
+    def render(self, content: Any) -> bytes:
+        if self.adapter is not None:
+            return self.adapter.dump_json(content)
+        return content.model_dump_json().encode("utf-8")
@@ -2,13 +2,45 @@
 AWS S3 Service for File Storage
 """
 
+import asyncio
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Optional, BinaryIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Optional, AsyncIterator, Iterator, Tuple
 import mimetypes
-from io import BytesIO
 
 from app.core.config import settings
+from app.utils.logging import get_logger
+
+
+logger = get_logger("s3")
+
+# Ranged download tuning: bytes per GET and GETs kept in flight
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MiB
+DOWNLOAD_PREFETCH = 4
+
+# Shared client settings: enough pooled connections for the executor and
+# managed transfers, fast adaptive retries, keep-alive on idle sockets
+S3_CLIENT_CONFIG = Config(
+    retries={'max_attempts': 3, 'mode': 'adaptive'},
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    signature_version='s3v4'
+)
+
+# Multipart upload part size (S3 minimum is 5 MiB except the last part)
+UPLOAD_PART_SIZE = 8 * 1024 * 1024  # 8 MiB
+# Parts of a streamed upload sent concurrently (bounds memory per upload)
+UPLOAD_PARTS_IN_FLIGHT = 4
+
+
+def _is_missing(error: ClientError) -> bool:
+    """Whether an S3 error means the object does not exist"""
+    return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
 
 
 class S3Service:
@@ -16,7 +48,7 @@ class S3Service:
     
     def __init__(self):
         self._client = None
-        self._resource = None
+        self._executor: Optional[ThreadPoolExecutor] = None
     
     @property
     def client(self):
@@ -26,85 +58,138 @@ class S3Service:
                 's3',
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
+                region_name=settings.AWS_REGION,
+                config=S3_CLIENT_CONFIG
             )
         return self._client
     
     @property
-    def resource(self):
-        """Get S3 resource (lazy initialization)"""
-        if self._resource is None:
-            self._resource = boto3.resource(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool for blocking S3 calls (lazy initialization)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=DOWNLOAD_PREFETCH * 4,
+                thread_name_prefix="s3"
             )
-        return self._resource
+        return self._executor
     
     @property
     def bucket_name(self) -> str:
         """Get bucket name from settings"""
         return settings.S3_BUCKET_NAME
     
-    def upload_file(
+    async def upload_chunks(
         self,
-        file_data: BinaryIO,
+        chunks: AsyncIterator[bytes],
         s3_key: str,
         content_type: Optional[str] = None
     ) -> bool:
         """
-        Upload a file to S3 private bucket
+        Stream chunks to a private S3 object without buffering the whole file
+        
+        A single chunk is sent with one PUT; anything larger becomes a
+        multipart upload with one part per chunk; up to
+        UPLOAD_PARTS_IN_FLIGHT parts upload while the next chunk is read.
+        The multipart upload is aborted if the chunk source raises or S3
+        rejects a part.
         
         Args:
-            file_data: File-like object to upload
+            chunks: Async iterator of file chunks (UPLOAD_PART_SIZE each,
+                except the last)
             s3_key: The key (path) in S3 bucket
             content_type: MIME type of the file
             
         Returns:
             bool: True if upload successful, False otherwise
         """
+        loop = asyncio.get_running_loop()
+        
+        def run(func, **kwargs):
+            return loop.run_in_executor(self.executor, partial(func, **kwargs))
+        
+        extra_args = {'ACL': 'private'}
+        if content_type:
+            extra_args['ContentType'] = content_type
+        
+        first = await anext(chunks, b"")
+        second = await anext(chunks, None)
+        
+        if second is None:
+            try:
+                await run(
+                    self.client.put_object,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    Body=first,
+                    **extra_args
+                )
+                return True
+            except ClientError as e:
+                logger.error("S3 Upload Error: %s", e)
+                return False
+        
         try:
-            extra_args = {}
-            if content_type:
-                extra_args['ContentType'] = content_type
-            
-            # Ensure private ACL (no public access)
-            extra_args['ACL'] = 'private'
-            
-            self.client.upload_fileobj(
-                file_data,
-                self.bucket_name,
-                s3_key,
-                ExtraArgs=extra_args
+            upload = await run(
+                self.client.create_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                **extra_args
             )
-            return True
         except ClientError as e:
-            print(f"S3 Upload Error: {e}")
+            logger.error("S3 Upload Error: %s", e)
             return False
-    
-    def download_file(self, s3_key: str) -> Optional[BytesIO]:
-        """
-        Download a file from S3 bucket
+        upload_id = upload['UploadId']
         
-        Args:
-            s3_key: The key (path) in S3 bucket
-            
-        Returns:
-            BytesIO object containing file data, or None if error
-        """
+        async def upload_part(part_number: int, body: bytes) -> dict:
+            response = await run(
+                self.client.upload_part,
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+            return {'ETag': response['ETag'], 'PartNumber': part_number}
+        
+        parts = []
+        in_flight = deque()
         try:
-            file_obj = BytesIO()
-            self.client.download_fileobj(
-                self.bucket_name,
-                s3_key,
-                file_obj
+            part_number = 0
+            chunk = first
+            while chunk is not None:
+                part_number += 1
+                in_flight.append(asyncio.ensure_future(upload_part(part_number, chunk)))
+                if len(in_flight) >= UPLOAD_PARTS_IN_FLIGHT:
+                    parts.append(await in_flight.popleft())
+                chunk = second if part_number == 1 else await anext(chunks, None)
+            while in_flight:
+                parts.append(await in_flight.popleft())
+            
+            await run(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
             )
-            file_obj.seek(0)
-            return file_obj
-        except ClientError as e:
-            print(f"S3 Download Error: {e}")
-            return None
+            return True
+        except BaseException as e:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            try:
+                await run(
+                    self.client.abort_multipart_upload,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    UploadId=upload_id
+                )
+            except ClientError as abort_error:
+                logger.error("S3 Abort Error: %s", abort_error)
+            if isinstance(e, ClientError):
+                logger.error("S3 Upload Error: %s", e)
+                return False
+            raise
     
     def delete_file(self, s3_key: str) -> bool:
         """
@@ -123,13 +208,16 @@ class S3Service:
             )
             return True
         except ClientError as e:
-            print(f"S3 Delete Error: {e}")
+            logger.error("S3 Delete Error: %s", e)
             return False
     
     def file_exists(self, s3_key: str) -> bool:
         """
         Check if a file exists in S3 bucket
         
+        Costs a HEAD request; download paths skip it and detect missing
+        objects from their own GET instead.
+        
         Args:
             s3_key: The key (path) in S3 bucket
             
@@ -142,7 +230,9 @@ class S3Service:
                 Key=s3_key
             )
             return True
-        except ClientError:
+        except ClientError as e:
+            if not _is_missing(e):
+                logger.error("S3 Head Error: %s", e)
             return False
     
     def get_file_metadata(self, s3_key: str) -> Optional[dict]:
@@ -169,25 +259,126 @@ class S3Service:
         except ClientError:
             return None
     
-    def get_file_stream(self, s3_key: str):
+    def generate_presigned_url(
+        self,
+        s3_key: str,
+        filename: str,
+        content_type: Optional[str] = None,
+        expires_in: Optional[int] = None
+    ) -> Optional[str]:
         """
-        Get a streaming response for a file (for large files)
+        Generate a short-lived presigned GET URL that downloads as an attachment
         
         Args:
             s3_key: The key (path) in S3 bucket
+            filename: Filename for the Content-Disposition header
+            content_type: MIME type to serve the file with
+            expires_in: URL lifetime in seconds
             
         Returns:
-            Streaming body or None if error
+            Presigned URL, or None if error
         """
+        params = {
+            'Bucket': self.bucket_name,
+            'Key': s3_key,
+            'ResponseContentDisposition': f'attachment; filename="{filename}"'
+        }
+        if content_type:
+            params['ResponseContentType'] = content_type
+        
         try:
-            response = self.client.get_object(
-                Bucket=self.bucket_name,
-                Key=s3_key
+            return self.client.generate_presigned_url(
+                'get_object',
+                Params=params,
+                ExpiresIn=expires_in or settings.S3_PRESIGNED_URL_EXPIRE_SECONDS
             )
-            return response['Body']
         except ClientError as e:
-            print(f"S3 Stream Error: {e}")
+            logger.error("S3 Presign Error: %s", e)
             return None
+    
+    def _read_range(self, s3_key: str, start: int, end: int) -> bytes:
+        """Read an inclusive byte range of an object"""
+        response = self.client.get_object(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            Range=f"bytes={start}-{end}"
+        )
+        return response['Body'].read()
+    
+    async def get_file_chunks(
+        self,
+        s3_key: str,
+        file_size: int,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        prefetch: int = DOWNLOAD_PREFETCH
+    ) -> Optional[AsyncIterator[bytes]]:
+        """
+        Stream a file as ordered chunks fetched with parallel ranged GETs
+        
+        The first range is read eagerly so a missing object is reported
+        before the response starts; the rest are prefetched ``prefetch``
+        at a time on the S3 thread pool.
+        
+        Args:
+            s3_key: The key (path) in S3 bucket
+            file_size: Object size in bytes
+            chunk_size: Bytes per ranged GET
+            prefetch: Number of ranged GETs kept in flight
+            
+        Returns:
+            Async iterator of file chunks, or None if error
+        """
+        ranges = (
+            (start, min(start + chunk_size, file_size) - 1)
+            for start in range(0, file_size, chunk_size)
+        )
+        first_range = next(ranges, None)
+        if first_range is None:
+            return self._iter_ranges(s3_key, b"", ranges, prefetch)
+        
+        loop = asyncio.get_running_loop()
+        try:
+            first_chunk = await loop.run_in_executor(
+                self.executor, self._read_range, s3_key, *first_range
+            )
+        except ClientError as e:
+            if _is_missing(e):
+                logger.warning("S3 object missing: %s", s3_key)
+            else:
+                logger.error("S3 Stream Error: %s", e)
+            return None
+        
+        return self._iter_ranges(s3_key, first_chunk, ranges, prefetch)
+    
+    async def _iter_ranges(
+        self,
+        s3_key: str,
+        first_chunk: bytes,
+        ranges: Iterator[Tuple[int, int]],
+        prefetch: int
+    ) -> AsyncIterator[bytes]:
+        """Yield chunks in order while keeping ranged GETs in flight"""
+        loop = asyncio.get_running_loop()
+        pending = deque()
+        
+        def schedule() -> None:
+            for start, end in islice(ranges, prefetch - len(pending)):
+                pending.append(loop.run_in_executor(
+                    self.executor, self._read_range, s3_key, start, end
+                ))
+        
+        try:
+            schedule()
+            if first_chunk:
+                yield first_chunk
+            while pending:
+                chunk = await pending.popleft()
+                schedule()
+                yield chunk
+        finally:
+            # Client went away: drop GETs that have not started yet
+            for future in pending:
+                future.cancel()
 
 
 # Global S3 service instance
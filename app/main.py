@@ -6,52 +6,67 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi.encoders import jsonable_encoder
 from contextlib import asynccontextmanager
-import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import engine, Base, SessionLocal
+from app.core.middleware import ProcessTimeMiddleware
+from app.core.database import engine, SessionLocal, audit_engine, AuditSessionLocal, dialect_insert
 from app.core.redis import redis_client
 from app.api.v1.router import api_router
 from app.models.role import Role
 from app.models.user import User
 from app.security.password import hash_password
+from app.security.rbac import UserRole
+from app.services.audit_sink import audit_sink
+from app.services.role_cache import invalidate_roles, load_role_ids
 
 
-def init_roles(db):
-    """Initialize default roles"""
-    default_roles = [
-        {"name": "admin", "description": "Administrator with full access"},
-        {"name": "user", "description": "Regular user with file management access"},
-        {"name": "viewer", "description": "Viewer with read-only access to shared files"}
-    ]
-    
-    for role_data in default_roles:
-        existing = db.query(Role).filter(Role.name == role_data["name"]).first()
-        if not existing:
-            role = Role(**role_data)
-            db.add(role)
-    
-    db.commit()
+# Seed rows for the RBAC roles, inserted as plain mappings (no ORM objects)
+DEFAULT_ROLES = (
+    {"name": UserRole.ADMIN.value, "description": "Administrator with full access"},
+    {"name": UserRole.USER.value, "description": "Regular user with file management access"},
+    {"name": UserRole.VIEWER.value, "description": "Viewer with read-only access to shared files"}
+)
+
+
+def _insert_ignore(db: AsyncSession, model):
+    """INSERT ... ON CONFLICT DO NOTHING for the session's dialect"""
+    return dialect_insert(db, model).on_conflict_do_nothing()
+
+
+async def init_roles(db: AsyncSession):
+    """
+    Initialize default roles
+    Single idempotent insert, safe when several workers start at once
+    """
+    await db.execute(_insert_ignore(db, Role).values(list(DEFAULT_ROLES)))
+    await db.commit()
 
 
-def init_admin_user(db):
+async def init_admin_user(db: AsyncSession):
     """Initialize default admin user"""
     admin_email = settings.ADMIN_EMAIL
-    admin = db.query(User).filter(User.email == admin_email).first()
+    result = await db.execute(select(User.id).where(User.email == admin_email))
+    if result.first() is not None:
+        return
     
-    if not admin:
-        admin_role = db.query(Role).filter(Role.name == "admin").first()
-        admin = User(
+    # Another worker may insert it between the check and here
+    admin_role_id = select(Role.id).where(Role.name == UserRole.ADMIN.value).scalar_subquery()
+    result = await db.execute(
+        _insert_ignore(db, User).values(
             email=admin_email,
             hashed_password=hash_password(settings.ADMIN_PASSWORD),
             full_name="System Administrator",
-            role_id=admin_role.id if admin_role else None,
+            role_id=admin_role_id,
             is_active=True,
             is_verified=True
         )
-        db.add(admin)
-        db.commit()
+    )
+    await db.commit()
+    if result.rowcount:
         print(f"✅ Default admin user created: {admin_email}")
 
 
@@ -59,32 +74,35 @@ def init_admin_user(db):
 async def lifespan(app: FastAPI):
     """
     Application lifespan events
-    Runs on startup and shutdown
+    Runs on startup and shutdown (schema is managed by ``alembic upgrade head``)
     """
     # Startup
     print("🚀 Starting Secure File Sharing System...")
     
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created")
-    
     # Initialize roles and admin user
-    db = SessionLocal()
-    try:
-        init_roles(db)
+    async with SessionLocal() as db:
+        await init_roles(db)
+        await load_role_ids(db)  # First registration skips the role lookup
         print("✅ Default roles initialized")
         
-        init_admin_user(db)
-    finally:
-        db.close()
+        await init_admin_user(db)
     
     # Connect to Redis
     try:
         redis_client.connect()
         print("✅ Redis connected")
+        await invalidate_roles()  # Startup may have seeded roles
     except Exception as e:
         print(f"⚠️ Redis connection failed: {e}")
     
+    # Start background audit writer
+    if settings.AUDIT_LOG_BATCHING:
+        await audit_sink.start(
+            AuditSessionLocal,
+            redis=redis_client if settings.AUDIT_LOG_QUEUE == "redis" else None
+        )
+        print("✅ Audit log writer started")
+    
     print("✅ Application started successfully!")
     print(f"📚 API Docs: http://localhost:8000{settings.API_V1_PREFIX}/docs")
     
@@ -92,7 +110,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Shutting down...")
-    redis_client.close()
+    await audit_sink.stop()
+    await redis_client.close()
+    await engine.dispose()
+    await audit_engine.dispose()
     print("✅ Cleanup completed")
 
 
@@ -113,7 +134,8 @@ app = FastAPI(
     
     ## Security Features
     - All files stored in private S3 buckets
-    - No direct S3 access - all downloads through backend
+    - No public S3 access - downloads stream through the API (presigned
+      S3 redirects are opt-in via `S3_PRESIGNED_DOWNLOADS`)
     - Rate limiting on all endpoints
     - Full audit trail of all actions
     
@@ -128,25 +150,20 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# CORS middleware, only for cross-origin frontends (the dev server proxies /api)
+if settings.cors_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 
 # Request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Add processing time to response headers"""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+if settings.PROCESS_TIME_HEADER:
+    app.add_middleware(ProcessTimeMiddleware)
 
 
 # Exception handlers
@@ -157,7 +174,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": "Validation error",
-            "errors": exc.errors()
+            "errors": jsonable_encoder(exc.errors())
         }
     )
 
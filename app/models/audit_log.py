@@ -2,7 +2,7 @@
 Audit Log Model for tracking all sensitive actions
 """
 
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, Enum
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, Enum, Index, text
 from sqlalchemy.orm import relationship
 import enum
 
@@ -43,13 +43,46 @@ class AuditLog(BaseModel):
     """Audit log model for tracking all sensitive actions"""
     
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Keyset pagination order for unfiltered listings
+        Index("ix_audit_logs_created_id", text("created_at DESC"), text("id DESC")),
+        # Composite indexes matching AuditService filters (newest first)
+        Index("ix_audit_logs_user_created", "user_id", text("created_at DESC")),
+        Index(
+            "ix_audit_logs_resource_created",
+            "resource_type",
+            "resource_id",
+            text("created_at DESC")
+        ),
+        Index("ix_audit_logs_action_created", "action", text("created_at DESC")),
+        # Partial index: failures are rare and looked up on their own
+        Index(
+            "ix_audit_logs_status_failed",
+            "status",
+            text("created_at DESC"),
+            postgresql_where=text("status <> 'success'"),
+            sqlite_where=text("status <> 'success'")
+        ),
+    )
     
     # Who performed the action
     user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     user_email = Column(String(255), nullable=True)  # Store email in case user is deleted
     
     # What action was performed
-    action = Column(Enum(AuditAction), nullable=False, index=True)
+    # VARCHAR + CHECK (not a native ENUM type), storing the enum values;
+    # indexed by ix_audit_logs_action_created
+    action = Column(
+        Enum(
+            AuditAction,
+            native_enum=False,
+            length=32,
+            create_constraint=True,
+            name="ck_audit_logs_action",
+            values_callable=lambda actions: [action.value for action in actions]
+        ),
+        nullable=False
+    )
     
     # Resource affected
     resource_type = Column(String(50), nullable=True)  # e.g., "file", "user", "share_link"
@@ -18,6 +18,7 @@ class File(BaseModel):
     original_filename = Column(String(500), nullable=False)
     content_type = Column(String(255), nullable=False)
     size = Column(BigInteger, nullable=False)  # Size in bytes
+    checksum_sha256 = Column(String(64), nullable=True)  # Hex digest, computed while uploading
     
     # S3 storage information
     s3_key = Column(String(1000), unique=True, nullable=False, index=True)
@@ -2,7 +2,7 @@
 File Permission Model for file sharing
 """
 
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -20,6 +20,10 @@ class FilePermission(BaseModel):
     """File permission model for sharing files with users"""
     
     __tablename__ = "file_permissions"
+    __table_args__ = (
+        # One grant per user and file; grant_permission upserts against it
+        Index("uq_file_permissions_file_user", "file_id", "user_id", unique=True),
+    )
     
     # Foreign Keys
     file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False)
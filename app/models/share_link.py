@@ -3,9 +3,11 @@ Share Link Model (optional - primarily uses Redis)
 For persistent record of share links
 """
 
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import timezone
+from typing import Optional
+import time
 
 from app.models.base import BaseModel
 
@@ -14,13 +16,17 @@ class ShareLink(BaseModel):
     """Share link model for persistent record of expiring links"""
     
     __tablename__ = "share_links"
+    __table_args__ = (
+        # Active links per file by expiry; also covers the file_id FK for cascades
+        Index("ix_share_links_file_active_exp", "file_id", "is_active", "expires_at"),
+    )
     
     # Unique token for the share link
     token = Column(String(64), unique=True, nullable=False, index=True)
     
     # Foreign Keys
     file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False)
-    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
     
     # Link settings
     expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -44,21 +50,39 @@ class ShareLink(BaseModel):
     def __repr__(self):
         return f"<ShareLink(token={self.token[:8]}..., file_id={self.file_id})>"
     
+    @property
+    def expires_ts(self) -> Optional[float]:
+        """Expiry as a POSIX timestamp (naive values are UTC)"""
+        if self.expires_at is None:
+            return None
+        if self.expires_at.tzinfo is None:
+            return self.expires_at.replace(tzinfo=timezone.utc).timestamp()
+        return self.expires_at.timestamp()
+    
+    def is_expired_at(self, now: float) -> bool:
+        """
+        Check if link has expired at a given time
+        
+        Args:
+            now: POSIX timestamp, so callers checking many links read the clock once
+        """
+        expires_ts = self.expires_ts
+        return expires_ts is None or now > expires_ts
+    
     @property
     def is_expired(self) -> bool:
         """Check if link has expired"""
-        return datetime.utcnow() > self.expires_at.replace(tzinfo=None) if self.expires_at else True
+        return self.is_expired_at(time.time())
     
     @property
     def is_valid(self) -> bool:
-        """Check if link is still valid (not expired and active)"""
-        if not self.is_active:
-            return False
-        if self.is_expired:
-            return False
-        if self.max_downloads and self.download_count >= self.max_downloads:
-            return False
-        return True
+        """Check if link is still valid (active, under its download limit, not expired)"""
+        # Cheapest checks first; the clock is only read for otherwise-valid links
+        return bool(
+            self.is_active
+            and (not self.max_downloads or self.download_count < self.max_downloads)
+            and not self.is_expired
+        )
     
     @property
     def has_password(self) -> bool:
@@ -12,6 +12,8 @@ class User(BaseModel):
     """User model for authentication and authorization"""
     
     __tablename__ = "users"
+    # Fetch server defaults (created_at, updated_at) with INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
     
     email = Column(String(255), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
@@ -34,3 +36,8 @@ class User(BaseModel):
     def role_name(self) -> str:
         """Get role name or default to 'viewer'"""
         return self.role.name if self.role else "viewer"
+    
+    @property
+    def is_admin(self) -> bool:
+        """Whether the user has the admin role (role must already be loaded)"""
+        return self.role is not None and self.role.name == "admin"
@@ -36,6 +36,7 @@ from app.schemas.file import (
     FileUpdate,
     FilePermissionCreate,
     FilePermissionResponse,
+    FileDownloadURL,
     FileStats,
     PermissionLevel
 )
@@ -84,6 +85,7 @@ __all__ = [
     "FileUpdate",
     "FilePermissionCreate",
     "FilePermissionResponse",
+    "FileDownloadURL",
     "FileStats",
     "PermissionLevel",
     # Share
@@ -2,11 +2,13 @@
 Audit Log Pydantic Schemas
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
+from app.schemas.common import BaseSchema
+
 
 class AuditAction(str, Enum):
     """Audit action types"""
@@ -15,6 +17,7 @@ class AuditAction(str, Enum):
     LOGOUT = "logout"
     TOKEN_REFRESH = "token_refresh"
     PASSWORD_CHANGE = "password_change"
+    PASSWORD_RESET_REQUEST = "password_reset_request"
     USER_CREATE = "user_create"
     USER_UPDATE = "user_update"
     USER_DELETE = "user_delete"
@@ -30,12 +33,13 @@ class AuditAction(str, Enum):
     PERMISSION_REVOKE = "permission_revoke"
 
 
-class AuditLogResponse(BaseModel):
+class AuditLogResponse(BaseSchema):
     """Audit log response"""
     id: int
     user_id: Optional[int] = None
     user_email: Optional[str] = None
-    action: AuditAction
+    # Values come from the DB column's CHECK; documented as an enum, validated as str
+    action: str = Field(..., json_schema_extra={"enum": [action.value for action in AuditAction]})
     resource_type: Optional[str] = None
     resource_id: Optional[int] = None
     details: Optional[str] = None
@@ -43,9 +47,6 @@ class AuditLogResponse(BaseModel):
     user_agent: Optional[str] = None
     status: str
     created_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
 
 
 class AuditLogFilter(BaseModel):
@@ -65,3 +66,4 @@ class AuditLogListResponse(BaseModel):
     total: int
     page: int
     size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page
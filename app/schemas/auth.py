@@ -2,9 +2,12 @@
 Authentication Pydantic Schemas
 """
 
-from pydantic import BaseModel, EmailStr
+from dataclasses import dataclass
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional
 
+from app.schemas.user import validate_password_strength
+
 
 class Token(BaseModel):
     """JWT token response"""
@@ -13,8 +16,9 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
-class TokenData(BaseModel):
-    """Token payload data"""
+@dataclass(slots=True)
+class TokenData:
+    """Token payload data (internal, never validated)"""
     user_id: Optional[int] = None
     email: Optional[str] = None
     role: Optional[str] = None
@@ -36,6 +40,11 @@ class RegisterRequest(BaseModel):
     email: EmailStr
     password: str
     full_name: Optional[str] = None
+    
+    @field_validator('password', mode='after')
+    @classmethod
+    def validate_password(cls, v):
+        return validate_password_strength(v)
 
 
 class LogoutRequest(BaseModel):
@@ -52,3 +61,8 @@ class ResetPasswordRequest(BaseModel):
     """Reset password request"""
     token: str
     new_password: str
+    
+    @field_validator('new_password', mode='after')
+    @classmethod
+    def validate_password(cls, v):
+        return validate_password_strength(v)
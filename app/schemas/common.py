@@ -2,7 +2,7 @@
 Common Pydantic Schemas
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import Optional, Generic, TypeVar, List
 
@@ -10,13 +10,13 @@ T = TypeVar('T')
 
 
 class BaseSchema(BaseModel):
-    """Base schema with common configuration"""
+    """
+    Base schema for models read from ORM objects
     
-    class Config:
-        from_attributes = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
+    Core schemas are built on first use rather than at import.
+    """
+    
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class TimestampMixin(BaseModel):
@@ -47,8 +47,9 @@ class PaginatedResponse(BaseModel, Generic[T]):
     
     @classmethod
     def create(cls, items: List[T], total: int, page: int, size: int):
+        """Build a page from already-validated items without re-validating them"""
         pages = (total + size - 1) // size if size > 0 else 0
-        return cls(items=items, total=total, page=page, size=size, pages=pages)
+        return cls.model_construct(items=items, total=total, page=page, size=size, pages=pages)
 
 
 class HealthCheck(BaseModel):
@@ -7,6 +7,8 @@ from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
+from app.schemas.common import BaseSchema
+
 
 class PermissionLevel(str, Enum):
     """Permission level enum"""
@@ -21,40 +23,36 @@ class FileBase(BaseModel):
     description: Optional[str] = None
 
 
-class FileUploadResponse(BaseModel):
+class FileUploadResponse(BaseSchema):
     """File upload response"""
     id: int
     filename: str
     original_filename: str
     content_type: str
     size: int
+    checksum_sha256: Optional[str] = None
     s3_key: str
     owner_id: int
     created_at: Optional[datetime] = None
     message: str = "File uploaded successfully"
-    
-    class Config:
-        from_attributes = True
 
 
-class FileResponse(BaseModel):
+class FileResponse(BaseSchema):
     """File detail response"""
     id: int
     filename: str
     original_filename: str
     content_type: str
     size: int
+    checksum_sha256: Optional[str] = None
     description: Optional[str] = None
     owner_id: int
     owner_email: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
 
 
-class FileListResponse(BaseModel):
+class FileListResponse(BaseSchema):
     """File list item response"""
     id: int
     filename: str
@@ -62,9 +60,6 @@ class FileListResponse(BaseModel):
     content_type: str
     size: int
     created_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
 
 
 class FileUpdate(BaseModel):
@@ -81,7 +76,7 @@ class FilePermissionCreate(BaseModel):
     can_share: bool = False
 
 
-class FilePermissionResponse(BaseModel):
+class FilePermissionResponse(BaseSchema):
     """File permission response"""
     id: int
     file_id: int
@@ -92,9 +87,12 @@ class FilePermissionResponse(BaseModel):
     can_share: bool
     granted_by_id: Optional[int] = None
     created_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
+
+
+class FileDownloadURL(BaseModel):
+    """Presigned download URL"""
+    url: str
+    expires_in: int  # Seconds until the URL stops working
 
 
 class FileStats(BaseModel):
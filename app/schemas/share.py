@@ -2,10 +2,12 @@
 Share Link Pydantic Schemas
 """
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, AliasPath
 from typing import Optional
 from datetime import datetime
 
+from app.schemas.common import BaseSchema
+
 
 class ShareLinkCreate(BaseModel):
     """Create share link request"""
@@ -15,17 +17,9 @@ class ShareLinkCreate(BaseModel):
     password: Optional[str] = Field(None, min_length=1)  # Password protection
     requires_auth: bool = False
     allowed_email: Optional[str] = None
-    
-    @validator('expiry_minutes')
-    def validate_expiry(cls, v):
-        if v < 1:
-            raise ValueError('Expiry must be at least 1 minute')
-        if v > 43200:  # 30 days
-            raise ValueError('Expiry cannot exceed 30 days')
-        return v
 
 
-class ShareLinkResponse(BaseModel):
+class ShareLinkResponse(BaseSchema):
     """Share link response"""
     token: str
     share_url: str
@@ -37,9 +31,6 @@ class ShareLinkResponse(BaseModel):
     has_password: bool = False
     requires_auth: bool = False
     created_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
 
 
 class ShareLinkInfo(BaseModel):
@@ -64,12 +55,12 @@ class ShareLinkValidation(BaseModel):
     expires_at: Optional[datetime] = None
 
 
-class ShareLinkListResponse(BaseModel):
+class ShareLinkListResponse(BaseSchema):
     """Share link list item"""
     id: int
     token: str
     file_id: int
-    filename: str
+    filename: str = Field(validation_alias=AliasPath("file", "filename"))
     expires_at: datetime
     is_active: bool
     download_count: int
@@ -77,5 +68,4 @@ class ShareLinkListResponse(BaseModel):
     has_password: bool = False
     created_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(populate_by_name=True)
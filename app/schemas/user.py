@@ -2,9 +2,31 @@
 User Pydantic Schemas
 """
 
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
 from datetime import datetime
+import re
+
+from app.schemas.common import BaseSchema
+
+
+# Password strength rules, compiled once at import
+_HAS_UPPER = re.compile(r"[A-Z]")
+_HAS_LOWER = re.compile(r"[a-z]")
+_HAS_DIGIT = re.compile(r"\d")
+
+
+def validate_password_strength(password: str) -> str:
+    """Require 8+ chars with an uppercase letter, a lowercase letter and a digit"""
+    if len(password) < 8:
+        raise ValueError('Password must be at least 8 characters long')
+    if not _HAS_UPPER.search(password):
+        raise ValueError('Password must contain at least one uppercase letter')
+    if not _HAS_LOWER.search(password):
+        raise ValueError('Password must contain at least one lowercase letter')
+    if not _HAS_DIGIT.search(password):
+        raise ValueError('Password must contain at least one digit')
+    return password
 
 
 class RoleBase(BaseModel):
@@ -18,13 +40,10 @@ class RoleCreate(RoleBase):
     pass
 
 
-class RoleResponse(RoleBase):
+class RoleResponse(RoleBase, BaseSchema):
     """Role response schema"""
     id: int
     created_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
 
 
 class UserBase(BaseModel):
@@ -37,17 +56,10 @@ class UserCreate(UserBase):
     """User registration schema"""
     password: str = Field(..., min_length=8, max_length=100)
     
-    @validator('password')
+    @field_validator('password', mode='after')
+    @classmethod
     def validate_password(cls, v):
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        if not any(c.isupper() for c in v):
-            raise ValueError('Password must contain at least one uppercase letter')
-        if not any(c.islower() for c in v):
-            raise ValueError('Password must contain at least one lowercase letter')
-        if not any(c.isdigit() for c in v):
-            raise ValueError('Password must contain at least one digit')
-        return v
+        return validate_password_strength(v)
 
 
 class UserLogin(BaseModel):
@@ -71,15 +83,9 @@ class PasswordChange(BaseModel):
     """Password change schema"""
     current_password: str
     new_password: str = Field(..., min_length=8, max_length=100)
-    
-    @validator('new_password')
-    def validate_password(cls, v):
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        return v
 
 
-class UserResponse(UserBase):
+class UserResponse(UserBase, BaseSchema):
     """User response schema"""
     id: int
     is_active: bool
@@ -87,12 +93,9 @@ class UserResponse(UserBase):
     role: Optional[RoleResponse] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
 
 
-class UserListResponse(BaseModel):
+class UserListResponse(BaseSchema):
     """User list response"""
     id: int
     email: str
@@ -100,6 +103,3 @@ class UserListResponse(BaseModel):
     is_active: bool
     role_name: Optional[str] = None
     created_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
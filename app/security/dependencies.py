@@ -5,23 +5,46 @@ FastAPI dependencies for protecting endpoints
 
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import Optional, List
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.redis import get_redis, RedisClient
 from app.security.jwt import verify_access_token
-from app.security.rbac import UserRole, has_role, has_permission
+from app.security.rbac import UserRole, ROLE_HIERARCHY_SET, has_permission
+from app.security.user_cache import get_cached_user, cache_user
 from app.models.user import User
 
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Built once; SQLAlchemy's compiled cache then reuses its SQL on every miss
+_USER_WITH_ROLE_BY_ID = (
+    select(User)
+    .options(joinedload(User.role))
+    .where(User.id == bindparam("user_id"))
+)
+
+
+async def _load_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """Load a user with its role, from the Redis cache when possible"""
+    user = await get_cached_user(user_id)
+    if user is None:
+        result = await db.execute(_USER_WITH_ROLE_BY_ID, {"user_id": user_id})
+        user = result.scalar_one_or_none()
+        if user is not None:
+            await cache_user(user)
+    return user
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Get current authenticated user from JWT token
@@ -31,7 +54,8 @@ async def get_current_user(
         db: Database session
         
     Returns:
-        User object if authenticated
+        User object (with role) if authenticated; served from a short-lived
+        Redis cache when possible, so it may be detached from the session
         
     Raises:
         HTTPException: If token is invalid or user not found
@@ -52,7 +76,7 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await _load_user(db, int(user_id))
     if user is None:
         raise credentials_exception
     
@@ -65,6 +89,25 @@ async def get_current_user(
     return user
 
 
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncSession = Depends(get_db)
+) -> Optional[User]:
+    """
+    Get the authenticated user on endpoints where authentication is optional
+    
+    Returns:
+        None without a valid bearer token, otherwise the user as resolved
+        by get_current_user
+        
+    Raises:
+        HTTPException: If the token's user no longer exists or is deactivated
+    """
+    if credentials is None or verify_access_token(credentials.credentials) is None:
+        return None
+    return await get_current_user(credentials, db)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -98,6 +141,12 @@ def require_role(required_roles: List[UserRole]):
     Returns:
         Dependency function
     """
+    # Role names that hold any of the required roles, resolved once per factory call
+    allowed_roles = frozenset(
+        role for role, held in ROLE_HIERARCHY_SET.items()
+        if any(required.value in held for required in required_roles)
+    )
+    
     async def role_checker(
         current_user: User = Depends(get_current_user)
     ) -> User:
@@ -109,12 +158,7 @@ def require_role(required_roles: List[UserRole]):
                 detail="User has no role assigned"
             )
         
-        # Check if user has any of the required roles
-        has_required_role = any(
-            has_role(user_role, role) for role in required_roles
-        )
-        
-        if not has_required_role:
+        if user_role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions"
@@ -158,7 +202,7 @@ require_viewer = require_role([UserRole.ADMIN, UserRole.USER, UserRole.VIEWER])
 
 
 class RateLimiter:
-    """Rate limiting using Redis"""
+    """Rate limiting using a Redis token bucket (atomic Lua script)"""
     
     def __init__(self, requests_per_minute: int = 60):
         self.requests_per_minute = requests_per_minute
@@ -173,10 +217,14 @@ class RateLimiter:
         client_ip = request.client.host if request.client else "unknown"
         key = f"rate_limit:{client_ip}:{request.url.path}"
         
-        # Increment counter
-        count = redis.increment(key, self.window_seconds)
+        # Bucket holds a minute's worth of requests, refilled continuously
+        allowed = await redis.consume_token(
+            key,
+            capacity=self.requests_per_minute,
+            refill_per_second=self.requests_per_minute / self.window_seconds
+        )
         
-        if count > self.requests_per_minute:
+        if not allowed:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Rate limit exceeded. Please try again later."
@@ -186,4 +234,4 @@ class RateLimiter:
 
 
 # Default rate limiter
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(settings.RATE_LIMIT_PER_MINUTE)
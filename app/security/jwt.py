@@ -3,22 +3,54 @@ JWT Token Handling
 Access and Refresh Token creation and validation
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import JWTError, jwt
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Final, Optional, Dict, Any, Tuple
+import jwt
+import time
 
 from app.core.config import settings
 
 
 class TokenType:
     """Token type constants"""
-    ACCESS = "access"
-    REFRESH = "refresh"
+    ACCESS: Final = "access"
+    REFRESH: Final = "refresh"
+
+
+# Encoded once; PyJWT signs and verifies HMAC through OpenSSL (hmac/hashlib)
+_SIGNING_KEY = settings.JWT_SECRET_KEY.encode("utf-8")
+_ALGORITHMS = [settings.JWT_ALGORITHM]
+
+# Token lifetimes in seconds
+_ACCESS_TOKEN_LIFETIME = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_REFRESH_TOKEN_LIFETIME = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+# Codec with its validation options merged once, instead of on every decode
+_JWT = jwt.PyJWT(options={"require": ["exp", "type"]})
+
+# In-process LRU of verified access tokens: token -> (expires_at, payload)
+ACCESS_TOKEN_CACHE_TTL_SECONDS = 60
+_access_token_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+
+def _encode_token(
+    data: Dict[str, Any],
+    token_type: str,
+    lifetime_seconds: int,
+    now: Optional[int] = None
+) -> str:
+    """Sign a payload with exp/iat as POSIX seconds and the token type"""
+    if now is None:
+        now = int(time.time())
+    payload = {**data, "exp": now + lifetime_seconds, "type": token_type, "iat": now}
+    return _JWT.encode(payload, _SIGNING_KEY, algorithm=settings.JWT_ALGORITHM)
 
 
 def create_access_token(
     data: Dict[str, Any],
-    expires_delta: Optional[timedelta] = None
+    expires_delta: Optional[timedelta] = None,
+    now: Optional[int] = None
 ) -> str:
     """
     Create a JWT access token
@@ -26,37 +58,19 @@ def create_access_token(
     Args:
         data: Payload data to encode in the token
         expires_delta: Optional custom expiration time
+        now: Issue time as POSIX seconds (defaults to the current time)
         
     Returns:
         Encoded JWT access token string
     """
-    to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
-    
-    to_encode.update({
-        "exp": expire,
-        "type": TokenType.ACCESS,
-        "iat": datetime.utcnow()
-    })
-    
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM
-    )
-    
-    return encoded_jwt
+    lifetime = int(expires_delta.total_seconds()) if expires_delta else _ACCESS_TOKEN_LIFETIME
+    return _encode_token(data, TokenType.ACCESS, lifetime, now)
 
 
 def create_refresh_token(
     data: Dict[str, Any],
-    expires_delta: Optional[timedelta] = None
+    expires_delta: Optional[timedelta] = None,
+    now: Optional[int] = None
 ) -> str:
     """
     Create a JWT refresh token
@@ -64,32 +78,13 @@ def create_refresh_token(
     Args:
         data: Payload data to encode in the token
         expires_delta: Optional custom expiration time
+        now: Issue time as POSIX seconds (defaults to the current time)
         
     Returns:
         Encoded JWT refresh token string
     """
-    to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(
-            days=settings.REFRESH_TOKEN_EXPIRE_DAYS
-        )
-    
-    to_encode.update({
-        "exp": expire,
-        "type": TokenType.REFRESH,
-        "iat": datetime.utcnow()
-    })
-    
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM
-    )
-    
-    return encoded_jwt
+    lifetime = int(expires_delta.total_seconds()) if expires_delta else _REFRESH_TOKEN_LIFETIME
+    return _encode_token(data, TokenType.REFRESH, lifetime, now)
 
 
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
@@ -103,13 +98,13 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
         Decoded payload dictionary or None if invalid
     """
     try:
-        payload = jwt.decode(
+        payload = _JWT.decode(
             token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
+            _SIGNING_KEY,
+            algorithms=_ALGORITHMS
         )
         return payload
-    except JWTError:
+    except jwt.PyJWTError:
         return None
 
 
@@ -117,18 +112,46 @@ def verify_access_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Verify an access token and return payload
     
+    Verified payloads are cached in-process for up to
+    ACCESS_TOKEN_CACHE_TTL_SECONDS (never past the token's own exp),
+    so repeated requests with the same token skip the HMAC check.
+    
     Args:
         token: JWT access token string
         
     Returns:
         Decoded payload if valid access token, None otherwise
     """
+    now = time.time()
+    cached = _access_token_cache.get(token)
+    if cached is not None:
+        expires_at, payload = cached
+        if now < expires_at:
+            _access_token_cache.move_to_end(token)
+            return payload
+        del _access_token_cache[token]
+    
     payload = decode_token(token)
     if payload and payload.get("type") == TokenType.ACCESS:
+        ttl = min(payload.get("exp", now) - now, ACCESS_TOKEN_CACHE_TTL_SECONDS)
+        if ttl > 0 and settings.JWT_CACHE_SIZE > 0:
+            _access_token_cache[token] = (now + ttl, payload)
+            if len(_access_token_cache) > settings.JWT_CACHE_SIZE:
+                _access_token_cache.popitem(last=False)
         return payload
     return None
 
 
+def forget_access_token(token: str) -> None:
+    """Drop a token from the verified-token cache so its next use is re-verified"""
+    _access_token_cache.pop(token, None)
+
+
+def clear_access_token_cache() -> None:
+    """Drop every cached access token (e.g. after a signing key change)"""
+    _access_token_cache.clear()
+
+
 def verify_refresh_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Verify a refresh token and return payload
@@ -163,8 +186,9 @@ def create_tokens(user_id: int, email: str, role: str) -> Dict[str, str]:
         "role": role
     }
     
-    access_token = create_access_token(token_data)
-    refresh_token = create_refresh_token(token_data)
+    now = int(time.time())
+    access_token = create_access_token(token_data, now=now)
+    refresh_token = create_refresh_token(token_data, now=now)
     
     return {
         "access_token": access_token,
@@ -2,7 +2,20 @@
 Password Hashing Utilities using bcrypt directly
 """
 
+from collections import OrderedDict
+import asyncio
 import bcrypt
+import hashlib
+import time
+
+from app.core.config import settings
+
+
+# In-process LRU of successful checks: digest of (hash, password) -> expires_at.
+# Keyed on the stored hash, so a password change never hits an old entry.
+# Failures are never cached, so a wrong guess always pays the full bcrypt cost.
+PASSWORD_CACHE_TTL_SECONDS = 30
+_verified_cache: "OrderedDict[bytes, float]" = OrderedDict()
 
 
 def hash_password(password: str) -> str:
@@ -27,6 +40,9 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain text password against a hashed password
     
+    With PASSWORD_CACHE_SIZE set, a match is remembered for
+    PASSWORD_CACHE_TTL_SECONDS so repeated logins skip bcrypt.
+    
     Args:
         plain_password: Plain text password to verify
         hashed_password: Hashed password to compare against
@@ -37,6 +53,48 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         password_bytes = plain_password.encode('utf-8')
         hashed_bytes = hashed_password.encode('utf-8')
+    except Exception:
+        return False
+    
+    if settings.PASSWORD_CACHE_SIZE <= 0:
+        return _checkpw(password_bytes, hashed_bytes)
+    
+    key = hashlib.sha256(hashed_bytes + b"\0" + password_bytes).digest()
+    now = time.monotonic()
+    expires_at = _verified_cache.get(key)
+    if expires_at is not None:
+        if now < expires_at:
+            return True
+        _verified_cache.pop(key, None)
+    
+    if not _checkpw(password_bytes, hashed_bytes):
+        return False
+    _verified_cache[key] = now + PASSWORD_CACHE_TTL_SECONDS
+    if len(_verified_cache) > settings.PASSWORD_CACHE_SIZE:
+        _verified_cache.popitem(last=False)
+    return True
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on a worker thread (bcrypt releases the GIL)"""
+    return await asyncio.get_running_loop().run_in_executor(None, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on a worker thread, keeping the event loop free"""
+    return await asyncio.get_running_loop().run_in_executor(
+        None, verify_password, plain_password, hashed_password
+    )
+
+
+def _checkpw(password_bytes: bytes, hashed_bytes: bytes) -> bool:
+    """bcrypt check that treats a malformed hash as a mismatch"""
+    try:
         return bcrypt.checkpw(password_bytes, hashed_bytes)
     except Exception:
         return False
+
+
+def clear_password_cache() -> None:
+    """Drop every remembered password check"""
+    _verified_cache.clear()
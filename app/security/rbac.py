@@ -3,7 +3,7 @@ Role-Based Access Control (RBAC) Implementation
 """
 
 from enum import Enum
-from typing import List
+from typing import Dict, FrozenSet, List
 
 
 class UserRole(str, Enum):
@@ -47,6 +47,15 @@ ROLE_PERMISSIONS = {
     ]
 }
 
+# Lookup tables keyed by the raw role string, built once at import
+_NO_ROLES: FrozenSet[str] = frozenset()
+ROLE_HIERARCHY_SET: Dict[str, FrozenSet[str]] = {
+    role.value: frozenset(r.value for r in roles) for role, roles in ROLE_HIERARCHY.items()
+}
+ROLE_PERMISSIONS_SET: Dict[str, FrozenSet[str]] = {
+    role.value: frozenset(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+}
+
 
 def has_role(user_role: str, required_role: UserRole) -> bool:
     """
@@ -59,12 +68,7 @@ def has_role(user_role: str, required_role: UserRole) -> bool:
     Returns:
         True if user has required role or higher
     """
-    try:
-        user_role_enum = UserRole(user_role)
-        allowed_roles = ROLE_HIERARCHY.get(user_role_enum, [])
-        return required_role in allowed_roles
-    except ValueError:
-        return False
+    return required_role.value in ROLE_HIERARCHY_SET.get(user_role, _NO_ROLES)
 
 
 def has_permission(user_role: str, permission: str) -> bool:
@@ -78,12 +82,7 @@ def has_permission(user_role: str, permission: str) -> bool:
     Returns:
         True if user has permission
     """
-    try:
-        user_role_enum = UserRole(user_role)
-        permissions = ROLE_PERMISSIONS.get(user_role_enum, [])
-        return permission in permissions
-    except ValueError:
-        return False
+    return permission in ROLE_PERMISSIONS_SET.get(user_role, _NO_ROLES)
 
 
 def get_role_permissions(role: str) -> List[str]:
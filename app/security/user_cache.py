@@ -0,0 +1,78 @@
+"""
+Authenticated User Cache
+Short-lived Redis cache of the user + role resolved from an access token
+"""
+
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.models.role import Role
+from app.models.user import User
+
+
+USER_CACHE_PREFIX = "user:"
+
+# Columns needed to rebuild the user for auth checks and /auth/me
+# (the password hash is never cached)
+_USER_FIELDS = ("id", "email", "full_name", "is_active", "is_verified", "role_id")
+_ROLE_FIELDS = ("id", "name", "description")
+_DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def _dump(obj, fields) -> Dict[str, Any]:
+    """Serialize selected attributes plus timestamps to JSON-safe values"""
+    data = {field: getattr(obj, field) for field in fields}
+    for field in _DATETIME_FIELDS:
+        value = getattr(obj, field)
+        data[field] = value.isoformat() if value else None
+    return data
+
+
+def _load(model, data: Dict[str, Any]):
+    """Build a transient model instance from _dump output"""
+    values = dict(data)
+    for field in _DATETIME_FIELDS:
+        if values.get(field):
+            values[field] = datetime.fromisoformat(values[field])
+    return model(**values)
+
+
+async def get_cached_user(user_id: int) -> Optional[User]:
+    """
+    Get a cached user with its role
+
+    Returns:
+        Transient (session-less) User, or None on a miss or when disabled
+    """
+    if settings.USER_CACHE_TTL_SECONDS <= 0:
+        return None
+
+    data = await redis_client.get(f"{USER_CACHE_PREFIX}{user_id}")
+    if not data:
+        return None
+
+    role_data = data.pop("role", None)
+    user = _load(User, data)
+    user.role = _load(Role, role_data) if role_data else None
+    return user
+
+
+async def cache_user(user: User) -> None:
+    """Cache a user loaded with its role"""
+    if settings.USER_CACHE_TTL_SECONDS <= 0:
+        return
+
+    data = _dump(user, _USER_FIELDS)
+    data["role"] = _dump(user.role, _ROLE_FIELDS) if user.role else None
+    await redis_client.set_with_expiry(
+        f"{USER_CACHE_PREFIX}{user.id}",
+        data,
+        settings.USER_CACHE_TTL_SECONDS
+    )
+
+
+async def invalidate_user(user_id: int) -> None:
+    """Drop a cached user after its profile, role or status changes"""
+    await redis_client.delete(f"{USER_CACHE_PREFIX}{user_id}")
@@ -4,21 +4,71 @@ Business logic for audit logging
 """
 
 import json
-from datetime import datetime
-from sqlalchemy.orm import Session
-from typing import Optional, List
-from fastapi import Request
+import base64
+import binascii
+from datetime import datetime, timezone
+from sqlalchemy import select, func, tuple_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from typing import Optional, List, Tuple, AsyncIterator
+from fastapi import HTTPException, Request
 
+from app.core.config import settings
 from app.models.audit_log import AuditLog, AuditAction
+from app.services.audit_sink import audit_sink
+
+
+# Security events committed before the response goes out, so they never sit
+# in a queue a crash could drop (concurrent ones still share one commit)
+DURABLE_ACTIONS = frozenset({AuditAction.LOGIN_FAILED})
+
+
+def request_meta(request: Request) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get the client IP and user agent of a request
+    
+    Parsed once per request and kept on ``request.state``, since one
+    request can log several audit events.
+    
+    Returns:
+        (ip_address, user_agent truncated to 500 chars)
+    """
+    meta = getattr(request.state, "audit_meta", None)
+    if meta is None:
+        get_header = request.headers.get
+        ip_address = request.client.host if request.client else None
+        # Prefer the forwarded IP (behind proxy)
+        forwarded = get_header("X-Forwarded-For")
+        if forwarded:
+            ip_address = forwarded.partition(",")[0].strip()
+        meta = (ip_address, get_header("User-Agent", "")[:500])
+        request.state.audit_meta = meta
+    return meta
+
+
+def encode_log_cursor(log: AuditLog) -> str:
+    """Encode the (created_at, id) position of a log as an opaque cursor"""
+    raw = f"{log.created_at.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_log_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from encode_log_cursor into (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, log_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 class AuditService:
     """Service for audit logging operations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def log(
+    async def log(
         self,
         action: AuditAction,
         user_id: Optional[int] = None,
@@ -27,11 +77,16 @@ class AuditService:
         resource_id: Optional[int] = None,
         details: Optional[str] = None,
         status: str = "success",
-        request: Optional[Request] = None
-    ) -> AuditLog:
+        request: Optional[Request] = None,
+        durable: bool = False
+    ) -> Optional[AuditLog]:
         """
         Create an audit log entry
         
+        Entries are handed to the background audit sink when it is running;
+        otherwise (or if its queue is full) they are written inline. Durable
+        entries and DURABLE_ACTIONS are committed before this returns.
+        
         Args:
             action: The action being logged
             user_id: ID of user performing action
@@ -41,42 +96,43 @@ class AuditService:
             details: Additional details (JSON string)
             status: success/failed/error
             request: FastAPI request object for IP/user-agent
-        """
-        # Extract request info
-        ip_address = None
-        user_agent = None
-        
-        if request:
-            # Get client IP
-            if request.client:
-                ip_address = request.client.host
-            # Check for forwarded IP (behind proxy)
-            forwarded = request.headers.get("X-Forwarded-For")
-            if forwarded:
-                ip_address = forwarded.split(",")[0].strip()
+            durable: Wait for the entry to be committed
             
-            user_agent = request.headers.get("User-Agent", "")[:500]
+        Returns:
+            The AuditLog row if written inline, None if queued
+        """
+        ip_address, user_agent = request_meta(request) if request else (None, None)
+        
+        entry = {
+            "user_id": user_id,
+            "user_email": user_email,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": details,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "status": status,
+            # Stamped here so queued and inline entries order the same way
+            "created_at": datetime.now(timezone.utc)
+        }
+        
+        if durable or action in DURABLE_ACTIONS:
+            if await audit_sink.submit_and_wait(entry):
+                return None
+        elif await audit_sink.submit(entry):
+            return None
         
         # Create audit log entry
-        audit_log = AuditLog(
-            user_id=user_id,
-            user_email=user_email,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            status=status
-        )
+        audit_log = AuditLog(**entry)
         
+        # No refresh: every column is set here and the id comes back from the insert
         self.db.add(audit_log)
-        self.db.commit()
-        self.db.refresh(audit_log)
+        await self.db.commit()
         
         return audit_log
     
-    def get_logs(
+    def _log_filters(
         self,
         user_id: Optional[int] = None,
         action: Optional[AuditAction] = None,
@@ -84,75 +140,198 @@ class AuditService:
         resource_id: Optional[int] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        status: Optional[str] = None,
-        skip: int = 0,
-        limit: int = 100
-    ) -> List[AuditLog]:
-        """Get audit logs with filters"""
-        query = self.db.query(AuditLog)
+        status: Optional[str] = None
+    ) -> list:
+        """Build WHERE clauses for audit log queries"""
+        filters = []
         
         if user_id:
-            query = query.filter(AuditLog.user_id == user_id)
+            filters.append(AuditLog.user_id == user_id)
         if action:
-            query = query.filter(AuditLog.action == action)
+            filters.append(AuditLog.action == action)
         if resource_type:
-            query = query.filter(AuditLog.resource_type == resource_type)
+            filters.append(AuditLog.resource_type == resource_type)
         if resource_id:
-            query = query.filter(AuditLog.resource_id == resource_id)
+            filters.append(AuditLog.resource_id == resource_id)
         if start_date:
-            query = query.filter(AuditLog.created_at >= start_date)
+            filters.append(AuditLog.created_at >= start_date)
         if end_date:
-            query = query.filter(AuditLog.created_at <= end_date)
+            filters.append(AuditLog.created_at <= end_date)
         if status:
-            query = query.filter(AuditLog.status == status)
+            filters.append(AuditLog.status == status)
+        
+        return filters
+    
+    async def get_logs(
+        self,
+        user_id: Optional[int] = None,
+        action: Optional[AuditAction] = None,
+        resource_type: Optional[str] = None,
+        resource_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Tuple[datetime, int]] = None
+    ) -> Tuple[List[AuditLog], int]:
+        """
+        Get a page of audit logs with filters
+        
+        The total match count is computed in the same query with
+        COUNT(*) OVER(), so the filter is only evaluated once. Unfiltered
+        offset pages (no cursor, any ``skip``) of a table larger than
+        AUDIT_LOG_EXACT_COUNT_MAX report the planner's row estimate
+        instead of counting every row.
+        
+        Args:
+            cursor: (created_at, id) of the last row already seen; when
+                given, the page starts right after it (keyset pagination)
+                and ``skip`` is ignored
         
-        return query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
+        Returns:
+            Tuple of (logs, total matching count). With a cursor the
+            total counts the matching rows from the cursor onward.
+        """
+        filters = self._log_filters(
+            user_id=user_id,
+            action=action,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            start_date=start_date,
+            end_date=end_date,
+            status=status
+        )
+        
+        estimated = None
+        if not filters and not cursor:
+            estimated = await self.get_logs_estimated_count()
+            if estimated is not None and estimated <= settings.AUDIT_LOG_EXACT_COUNT_MAX:
+                estimated = None
+        
+        if cursor:
+            # Seek past the cursor instead of scanning and discarding rows
+            filters.append(tuple_(AuditLog.created_at, AuditLog.id) < cursor)
+            skip = 0
+        
+        if estimated is not None:
+            result = await self.db.execute(
+                select(AuditLog).options(raiseload('*')).order_by(
+                    AuditLog.created_at.desc(),
+                    AuditLog.id.desc()
+                ).offset(skip).limit(limit)
+            )
+            return result.scalars().all(), estimated
+        
+        stmt = select(
+            AuditLog,
+            func.count().over().label("total")
+        ).options(raiseload('*')).where(
+            *filters
+        ).order_by(
+            AuditLog.created_at.desc(),
+            AuditLog.id.desc()
+        ).offset(skip).limit(limit)
+        
+        result = await self.db.execute(stmt)
+        rows = result.all()
+        
+        if rows:
+            return [row.AuditLog for row in rows], rows[0].total
+        
+        # Page past the end: no row carries the window count
+        if skip > 0:
+            return [], await self.get_logs_count(
+                user_id=user_id,
+                action=action,
+                resource_type=resource_type,
+                resource_id=resource_id,
+                start_date=start_date,
+                end_date=end_date,
+                status=status
+            )
+        
+        return [], 0
     
-    def get_logs_count(
+    async def get_logs_count(
         self,
         user_id: Optional[int] = None,
         action: Optional[AuditAction] = None,
         resource_type: Optional[str] = None,
+        resource_id: Optional[int] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        status: Optional[str] = None
     ) -> int:
         """Get total count of audit logs with filters"""
-        query = self.db.query(AuditLog)
+        filters = self._log_filters(
+            user_id=user_id,
+            action=action,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            start_date=start_date,
+            end_date=end_date,
+            status=status
+        )
         
-        if user_id:
-            query = query.filter(AuditLog.user_id == user_id)
-        if action:
-            query = query.filter(AuditLog.action == action)
-        if resource_type:
-            query = query.filter(AuditLog.resource_type == resource_type)
-        if start_date:
-            query = query.filter(AuditLog.created_at >= start_date)
-        if end_date:
-            query = query.filter(AuditLog.created_at <= end_date)
+        result = await self.db.execute(
+            select(func.count(AuditLog.id)).where(*filters)
+        )
+        return result.scalar_one()
+    
+    async def get_logs_estimated_count(self) -> Optional[int]:
+        """
+        Get the planner's row estimate for the audit log table
         
-        return query.count()
+        Returns:
+            Estimated row count (as of the last ANALYZE), or None when not
+            on PostgreSQL or the table has never been analyzed
+        """
+        if self.db.bind.dialect.name != "postgresql":
+            return None
+        result = await self.db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'audit_logs'::regclass")
+        )
+        estimate = result.scalar_one_or_none()
+        return estimate if estimate is not None and estimate >= 0 else None
     
-    def get_user_activity(
+    async def get_user_activity(
         self,
         user_id: int,
         limit: int = 50
     ) -> List[AuditLog]:
         """Get recent activity for a specific user"""
-        return self.db.query(AuditLog).filter(
-            AuditLog.user_id == user_id
-        ).order_by(AuditLog.created_at.desc()).limit(limit).all()
+        result = await self.db.execute(
+            select(AuditLog).options(raiseload('*')).where(
+                AuditLog.user_id == user_id
+            ).order_by(AuditLog.created_at.desc()).limit(limit)
+        )
+        return result.scalars().all()
     
-    def get_file_history(
+    async def stream_file_history(
         self,
-        file_id: int
-    ) -> List[AuditLog]:
-        """Get audit history for a specific file"""
-        return self.db.query(AuditLog).filter(
-            AuditLog.resource_type == "file",
-            AuditLog.resource_id == file_id
-        ).order_by(AuditLog.created_at.desc()).all()
+        file_id: int,
+        batch_size: int = 200
+    ) -> AsyncIterator[List[AuditLog]]:
+        """
+        Stream the audit history for a specific file, newest first
+        
+        Rows come from a server-side cursor ``batch_size`` at a time, so
+        long histories never sit in memory all at once.
+        """
+        result = await self.db.stream_scalars(
+            select(AuditLog).options(raiseload('*')).where(
+                AuditLog.resource_type == "file",
+                AuditLog.resource_id == file_id
+            ).order_by(
+                AuditLog.created_at.desc(),
+                AuditLog.id.desc()
+            ).execution_options(yield_per=batch_size)
+        )
+        async for logs in result.partitions():
+            yield logs
 
 
-def get_audit_service(db: Session) -> AuditService:
+def get_audit_service(db: AsyncSession) -> AuditService:
     """Factory function for AuditService"""
     return AuditService(db)
@@ -0,0 +1,265 @@
+"""
+Audit Log Sink
+Buffers audit entries and writes them in batches
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from typing import Optional, List, Dict, Any
+
+from app.core.config import settings
+from app.core.redis import RedisClient
+from app.models.audit_log import AuditLog, AuditAction
+from app.utils.logging import get_logger
+
+
+logger = get_logger("audit")
+
+AUDIT_QUEUE_KEY = "audit:queue"
+
+
+class AuditSink:
+    """
+    Background writer for audit log entries
+    
+    Entries are queued by the request path and inserted by a single task,
+    up to ``batch_size`` rows at a time or every ``flush_interval`` seconds.
+    
+    The queue is in-process by default. When started with a Redis client,
+    entries go to a shared Redis list instead, so any worker's writer can
+    drain them and a worker restart only loses the batch it was writing.
+    A batch whose insert fails is pushed back onto the list for retry.
+    
+    Callers that need their entry committed before they continue use
+    ``submit_and_wait``: concurrent waiters share one batch and one commit
+    (group commit) instead of each writing inline.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.1
+    ):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._redis: Optional[RedisClient] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._session_factory = None
+    
+    @property
+    def running(self) -> bool:
+        """Whether the background writer is accepting entries"""
+        return self._task is not None
+    
+    async def start(self, session_factory, redis: Optional[RedisClient] = None) -> None:
+        """
+        Start the background writer
+        
+        Args:
+            session_factory: Async session factory used for batch inserts
+            redis: Queue entries in Redis instead of in memory
+        """
+        if self._task is None:
+            self._session_factory = session_factory
+            if redis is not None:
+                self._redis = redis
+                self._stopping = asyncio.Event()
+                self._task = asyncio.create_task(self._run_redis())
+            else:
+                self._queue = asyncio.Queue(maxsize=self.maxsize)
+                self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop accepting entries and flush everything still queued"""
+        if self._task is None:
+            return
+        
+        task, self._task = self._task, None
+        if self._redis is not None:
+            self._stopping.set()
+        else:
+            await self._queue.put(None)
+        await task
+        self._queue = None
+        self._redis = None
+        self._stopping = None
+    
+    async def submit(self, entry: Dict[str, Any]) -> bool:
+        """
+        Queue an audit entry (AuditLog column values)
+        
+        Returns:
+            bool: True if queued, False if the caller should write it inline
+        """
+        if self._task is None:
+            return False
+        
+        # Stamp now, not at flush time, so ordering survives batching
+        entry.setdefault("created_at", datetime.now(timezone.utc))
+        if self._redis is not None:
+            return await self._redis.push_json(AUDIT_QUEUE_KEY, entry)
+        
+        try:
+            self._queue.put_nowait((entry, None))
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    async def submit_and_wait(self, entry: Dict[str, Any]) -> bool:
+        """
+        Queue an audit entry and wait until its batch is committed
+        
+        Returns:
+            bool: True once committed, False if the caller should write it
+            inline (not running, Redis queue, queue full or its row failed)
+        """
+        if self._task is None or self._redis is not None:
+            return False
+        
+        entry.setdefault("created_at", datetime.now(timezone.utc))
+        committed = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((entry, committed))
+        except asyncio.QueueFull:
+            return False
+        return await committed
+    
+    async def _run(self) -> None:
+        """Drain the queue in batches until the stop sentinel arrives"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            stopping = False
+            # A waiting caller flushes whatever is already queued right away
+            waiting = item[1] is not None
+            deadline = loop.time() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if waiting or timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                waiting = waiting or item[1] is not None
+            
+            written = await self._write([entry for entry, _ in batch])
+            for (_, committed), ok in zip(batch, written):
+                if committed is not None and not committed.done():
+                    committed.set_result(ok)
+            if stopping:
+                return
+    
+    async def _run_redis(self) -> None:
+        """Pop batches off the Redis list until stopped and the list is drained"""
+        while True:
+            try:
+                full = await self._drain_redis_batch()
+            except Exception as e:
+                logger.error("Audit log queue error: %s", e)
+                full = False
+            if full:
+                continue
+            if self._stopping.is_set():
+                return
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _drain_redis_batch(self) -> bool:
+        """
+        Write one batch from the Redis list, requeueing it if the insert fails
+        
+        Returns:
+            bool: True if a full batch was committed and more may be waiting
+        """
+        raw = await self._redis.pop_json(AUDIT_QUEUE_KEY, self.batch_size)
+        if not raw:
+            return False
+        
+        pending, batch = [], []
+        for entry in raw:
+            try:
+                batch.append(self._decode(entry))
+                pending.append(entry)
+            except Exception as e:
+                logger.error("Dropping malformed audit log entry %r: %s", entry, e)
+        
+        if batch and not any(await self._write(batch)):
+            # Nothing committed, so the database is likely unavailable: put the
+            # batch back on the tail (created_at keeps the stored order correct)
+            await self._redis.push_json_many(AUDIT_QUEUE_KEY, pending)
+            return False
+        return len(raw) == self.batch_size
+    
+    @staticmethod
+    def _decode(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Restore column types lost in the JSON round trip (returns a copy)"""
+        entry = dict(entry)
+        entry["action"] = AuditAction(entry["action"])
+        if entry.get("created_at"):
+            entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+        return entry
+    
+    async def _write(self, batch: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Insert a batch of entries, falling back to one row at a time
+        
+        One bad row fails the whole multi-row INSERT, so a failed batch is
+        retried row by row and only the rows that still fail are dropped.
+        
+        Returns:
+            List[bool]: Whether each entry was committed, in batch order
+        """
+        if await self._insert(batch):
+            return [True] * len(batch)
+        if len(batch) == 1:
+            return [False]
+        
+        written = []
+        for entry in batch:
+            written.append(await self._insert([entry]))
+        if not all(written):
+            logger.error(
+                "Dropped %d of %d audit log entries after row-by-row retry",
+                written.count(False), len(batch)
+            )
+        return written
+    
+    async def _insert(self, batch: List[Dict[str, Any]]) -> bool:
+        """Insert entries in one statement, returning whether it committed"""
+        try:
+            async with self._session_factory() as db:
+                await db.execute(insert(AuditLog), batch)
+                await db.commit()
+            return True
+        except Exception as e:
+            logger.error("Audit log batch write error: %s", e)
+            return False
+
+
+# Global audit sink instance
+audit_sink = AuditSink(
+    maxsize=settings.AUDIT_LOG_QUEUE_SIZE,
+    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL_MS / 1000
+)
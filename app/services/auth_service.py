@@ -3,62 +3,69 @@ Authentication Service
 Business logic for authentication
 """
 
-from sqlalchemy.orm import Session
+import secrets
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import Optional, Dict
 from fastapi import HTTPException, status, Request
 
 from app.models.user import User
-from app.models.role import Role
 from app.schemas.auth import RegisterRequest, LoginRequest
-from app.security.password import hash_password, verify_password
+from app.security.password import hash_password, hash_password_async, verify_password_async
 from app.security.jwt import create_tokens, verify_refresh_token
 from app.services.audit_service import AuditService
+from app.services.role_cache import get_role_id
 from app.models.audit_log import AuditAction
 
 
+# Checked when the email is unknown, so a miss costs the same bcrypt time as
+# a wrong password and response timing does not reveal which emails exist
+_DUMMY_PASSWORD_HASH = hash_password(secrets.token_urlsafe(32))
+
+
 class AuthService:
     """Service for authentication operations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.audit_service = AuditService(db)
     
-    def register(
+    async def register(
         self,
         register_data: RegisterRequest,
         request: Optional[Request] = None
     ) -> Dict:
         """Register a new user"""
-        # Check if user exists
-        existing_user = self.db.query(User).filter(
-            User.email == register_data.email
-        ).first()
-        
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-        
         # Get default 'user' role
-        default_role = self.db.query(Role).filter(Role.name == "user").first()
+        default_role_id = await get_role_id(self.db, "user")
         
         # Create user
         user = User(
             email=register_data.email,
-            hashed_password=hash_password(register_data.password),
+            hashed_password=await hash_password_async(register_data.password),
             full_name=register_data.full_name,
-            role_id=default_role.id if default_role else None,
+            role_id=default_role_id,
             is_active=True,
             is_verified=False
         )
         
+        # No existence pre-check: the unique email index rejects duplicates,
+        # saving a SELECT on every (almost always new) registration
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+        await user.awaitable_attrs.role
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.USER_CREATE,
             user_id=user.id,
             user_email=user.email,
@@ -77,21 +84,28 @@ class AuthService:
             "tokens": tokens
         }
     
-    def login(
+    async def login(
         self,
         login_data: LoginRequest,
         request: Optional[Request] = None
     ) -> Dict:
         """Authenticate user and return tokens"""
         # Find user
-        user = self.db.query(User).filter(
-            User.email == login_data.email
-        ).first()
+        result = await self.db.execute(
+            select(User).options(joinedload(User.role)).where(
+                User.email == login_data.email
+            )
+        )
+        user = result.scalars().first()
         
-        # Verify credentials
-        if not user or not verify_password(login_data.password, user.hashed_password):
+        # Verify credentials (always run bcrypt, even for unknown emails)
+        password_ok = await verify_password_async(
+            login_data.password,
+            user.hashed_password if user else _DUMMY_PASSWORD_HASH
+        )
+        if not user or not password_ok:
             # Log failed attempt
-            self.audit_service.log(
+            await self.audit_service.log(
                 action=AuditAction.LOGIN_FAILED,
                 user_email=login_data.email,
                 details=f"Failed login attempt for: {login_data.email}",
@@ -111,7 +125,7 @@ class AuthService:
             )
         
         # Log successful login
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.LOGIN_SUCCESS,
             user_id=user.id,
             user_email=user.email,
@@ -130,7 +144,7 @@ class AuthService:
             "tokens": tokens
         }
     
-    def refresh_token(
+    async def refresh_token(
         self,
         refresh_token: str,
         request: Optional[Request] = None
@@ -153,7 +167,12 @@ class AuthService:
             )
         
         # Get user
-        user = self.db.query(User).filter(User.id == int(user_id)).first()
+        result = await self.db.execute(
+            select(User).options(joinedload(User.role)).where(
+                User.id == int(user_id)
+            )
+        )
+        user = result.scalars().first()
         
         if not user:
             raise HTTPException(
@@ -168,7 +187,7 @@ class AuthService:
             )
         
         # Log token refresh
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.TOKEN_REFRESH,
             user_id=user.id,
             user_email=user.email,
@@ -183,7 +202,7 @@ class AuthService:
         
         return tokens
     
-    def logout(
+    async def logout(
         self,
         user: User,
         request: Optional[Request] = None
@@ -193,7 +212,7 @@ class AuthService:
         In a production system, you would blacklist the tokens in Redis
         """
         # Log logout
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.LOGOUT,
             user_id=user.id,
             user_email=user.email,
@@ -204,7 +223,7 @@ class AuthService:
         
         return True
     
-    def forgot_password(
+    async def forgot_password(
         self,
         email: str,
         request: Optional[Request] = None
@@ -219,11 +238,12 @@ class AuthService:
         For now, we just log the request (no email sending)
         """
         # Check if user exists (but don't reveal this to the caller)
-        user = self.db.query(User).filter(User.email == email).first()
+        result = await self.db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
         
         if user:
             # Log password reset request
-            self.audit_service.log(
+            await self.audit_service.log(
                 action=AuditAction.PASSWORD_RESET_REQUEST,
                 user_id=user.id,
                 user_email=user.email,
@@ -240,7 +260,7 @@ class AuthService:
         # Always return True for security (don't reveal if email exists)
         return True
     
-    def reset_password(
+    async def reset_password(
         self,
         token: str,
         new_password: str,
@@ -268,6 +288,6 @@ class AuthService:
         )
 
 
-def get_auth_service(db: Session) -> AuthService:
+def get_auth_service(db: AsyncSession) -> AuthService:
     """Factory function for AuthService"""
     return AuthService(db)
@@ -4,18 +4,21 @@ Business logic for file management
 """
 
 import uuid
+import hashlib
 from datetime import datetime
-from sqlalchemy.orm import Session
-from typing import Optional, List, BinaryIO
+from sqlalchemy import select, func, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
+from typing import Optional, List, BinaryIO, Tuple
 from fastapi import HTTPException, status, UploadFile, Request
-from io import BytesIO
 
 from app.models.file import File
 from app.models.file_permission import FilePermission, PermissionLevel
 from app.models.user import User
 from app.schemas.file import FileUpdate, FilePermissionCreate
-from app.core.s3 import s3_service
+from app.core.s3 import s3_service, UPLOAD_PART_SIZE
 from app.core.config import settings
+from app.core.database import dialect_insert
 from app.services.audit_service import AuditService
 from app.models.audit_log import AuditAction
 
@@ -23,7 +26,7 @@ from app.models.audit_log import AuditAction
 class FileService:
     """Service for file-related operations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.audit_service = AuditService(db)
         self.s3 = s3_service
@@ -49,21 +52,30 @@ class FileService:
         description: Optional[str] = None,
         request: Optional[Request] = None
     ) -> File:
-        """Upload a file to S3 and create metadata record"""
-        # Read file content
-        content = await file.read()
-        file_size = len(content)
-        
-        # Validate file size
-        self._validate_file_size(file_size)
+        """
+        Upload a file to S3 and create metadata record
+        The body is streamed to S3 in parts, so memory use stays at a few
+        parts per upload regardless of file size; the SHA-256 checksum is
+        updated from the same parts, so the file is only read once
+        """
+        file_size = 0
+        hasher = hashlib.sha256()
+        
+        async def read_chunks():
+            nonlocal file_size
+            while chunk := await file.read(UPLOAD_PART_SIZE):
+                file_size += len(chunk)
+                # Fail fast once the limit is crossed (aborts the upload)
+                self._validate_file_size(file_size)
+                hasher.update(chunk)
+                yield chunk
         
         # Generate S3 key
         s3_key = self._generate_s3_key(owner.id, file.filename)
         
-        # Upload to S3
-        file_obj = BytesIO(content)
-        success = self.s3.upload_file(
-            file_data=file_obj,
+        # Stream to S3
+        success = await self.s3.upload_chunks(
+            read_chunks(),
             s3_key=s3_key,
             content_type=file.content_type
         )
@@ -80,6 +92,7 @@ class FileService:
             original_filename=file.filename,
             content_type=file.content_type or "application/octet-stream",
             size=file_size,
+            checksum_sha256=hasher.hexdigest(),
             s3_key=s3_key,
             s3_bucket=settings.S3_BUCKET_NAME,
             owner_id=owner.id,
@@ -87,11 +100,11 @@ class FileService:
         )
         
         self.db.add(file_record)
-        self.db.commit()
-        self.db.refresh(file_record)
+        await self.db.commit()
+        await self.db.refresh(file_record)
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.FILE_UPLOAD,
             user_id=owner.id,
             user_email=owner.email,
@@ -103,55 +116,130 @@ class FileService:
         
         return file_record
     
-    def get_file_by_id(self, file_id: int) -> Optional[File]:
+    async def get_file_by_id(self, file_id: int) -> Optional[File]:
         """Get file by ID"""
-        return self.db.query(File).filter(
-            File.id == file_id,
-            File.is_deleted == False
-        ).first()
+        result = await self.db.execute(
+            select(File).where(
+                File.id == file_id,
+                File.is_deleted == False
+            )
+        )
+        return result.scalars().first()
     
-    def get_user_files(
+    def _permission_exists(self, file_id, user_id: int, download: bool = False):
+        """EXISTS subquery for a permission row of user on file"""
+        criteria = [
+            FilePermission.file_id == file_id,
+            FilePermission.user_id == user_id
+        ]
+        if download:
+            criteria.append(FilePermission.can_download == True)
+        return exists().where(*criteria)
+    
+    async def get_file_with_access(
+        self,
+        file_id: int,
+        user_id: int
+    ) -> Tuple[Optional[File], bool]:
+        """
+        Get file (with owner) and whether user holds a permission on it,
+        in a single query
+        
+        Returns:
+            Tuple of (file or None, has permission row)
+        """
+        result = await self.db.execute(
+            select(
+                File,
+                self._permission_exists(File.id, user_id).label("has_permission")
+            ).options(joinedload(File.owner)).where(
+                File.id == file_id,
+                File.is_deleted == False
+            )
+        )
+        row = result.first()
+        if row is None:
+            return None, False
+        return row.File, row.has_permission
+    
+    async def get_user_files(
         self,
         user_id: int,
         skip: int = 0,
         limit: int = 100
     ) -> List[File]:
         """Get files owned by user"""
-        return self.db.query(File).filter(
-            File.owner_id == user_id,
-            File.is_deleted == False
-        ).offset(skip).limit(limit).all()
+        result = await self.db.execute(
+            select(File).options(raiseload('*')).where(
+                File.owner_id == user_id,
+                File.is_deleted == False
+            ).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
     
-    def get_user_files_count(self, user_id: int) -> int:
+    async def get_user_files_count(self, user_id: int) -> int:
         """Get count of files owned by user"""
-        return self.db.query(File).filter(
-            File.owner_id == user_id,
-            File.is_deleted == False
-        ).count()
+        result = await self.db.execute(
+            select(func.count(File.id)).where(
+                File.owner_id == user_id,
+                File.is_deleted == False
+            )
+        )
+        return result.scalar_one()
+    
+    async def get_user_file_stats(self, user_id: int) -> Tuple[int, int]:
+        """Get (file count, total size in bytes) of files owned by user"""
+        result = await self.db.execute(
+            select(
+                func.count(File.id),
+                func.coalesce(func.sum(File.size), 0)
+            ).where(
+                File.owner_id == user_id,
+                File.is_deleted == False
+            )
+        )
+        total_files, total_size = result.one()
+        return total_files, int(total_size)
+    
+    async def get_shared_files_count(self, user_id: int) -> int:
+        """Get count of files shared with user"""
+        result = await self.db.execute(
+            select(func.count(File.id)).join(FilePermission).where(
+                FilePermission.user_id == user_id,
+                File.is_deleted == False
+            )
+        )
+        return result.scalar_one()
     
-    def get_shared_files(
+    async def get_shared_files(
         self,
         user_id: int,
         skip: int = 0,
         limit: int = 100
     ) -> List[File]:
         """Get files shared with user"""
-        return self.db.query(File).join(FilePermission).filter(
-            FilePermission.user_id == user_id,
-            File.is_deleted == False
-        ).offset(skip).limit(limit).all()
+        result = await self.db.execute(
+            select(File).options(raiseload('*')).join(FilePermission).where(
+                FilePermission.user_id == user_id,
+                File.is_deleted == False
+            ).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
     
-    def get_all_files(
+    async def get_all_files(
         self,
         skip: int = 0,
         limit: int = 100
     ) -> List[File]:
         """Get all files (admin only)"""
-        return self.db.query(File).filter(
-            File.is_deleted == False
-        ).offset(skip).limit(limit).all()
+        result = await self.db.execute(
+            select(File).options(raiseload('*')).where(
+                File.is_deleted == False
+            ).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
     
-    def download_file(
+    async def download_file(
         self,
         file_id: int,
         user: User,
@@ -159,64 +247,106 @@ class FileService:
     ) -> tuple:
         """
         Download file from S3
-        Returns tuple of (file_stream, filename, content_type)
+        Returns tuple of (file_stream, filename, content_type, size)
         """
-        # Get file
-        file_record = self.get_file_by_id(file_id)
-        if not file_record:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="File not found"
-            )
+        file_record = await self._get_downloadable_file(file_id, user)
         
-        # Check permissions
-        if not self._has_download_permission(file_record, user):
+        # Get file from S3
+        file_stream = await self.s3.get_file_chunks(file_record.s3_key, file_record.size)
+        if file_stream is None:
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to download this file"
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to retrieve file from storage"
             )
         
-        # Get file from S3
-        file_stream = self.s3.get_file_stream(file_record.s3_key)
-        if not file_stream:
+        # Log audit event
+        await self.audit_service.log(
+            action=AuditAction.FILE_DOWNLOAD,
+            user_id=user.id,
+            user_email=user.email,
+            resource_type="file",
+            resource_id=file_record.id,
+            details=f"File downloaded: {file_record.filename}",
+            request=request
+        )
+        
+        return (
+            file_stream,
+            file_record.original_filename,
+            file_record.content_type,
+            file_record.size
+        )
+    
+    async def get_download_url(
+        self,
+        file_id: int,
+        user: User,
+        request: Optional[Request] = None
+    ) -> str:
+        """
+        Issue a short-lived presigned S3 URL for downloading a file
+        The download is audited before the URL is handed out
+        """
+        file_record = await self._get_downloadable_file(file_id, user)
+        
+        url = self.s3.generate_presigned_url(
+            file_record.s3_key,
+            file_record.original_filename,
+            file_record.content_type
+        )
+        if url is None:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to retrieve file from storage"
             )
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.FILE_DOWNLOAD,
             user_id=user.id,
             user_email=user.email,
             resource_type="file",
             resource_id=file_record.id,
-            details=f"File downloaded: {file_record.filename}",
+            details=f"Download URL issued: {file_record.filename}",
             request=request
         )
         
-        return file_stream, file_record.original_filename, file_record.content_type
+        return url
     
-    def _has_download_permission(self, file: File, user: User) -> bool:
+    async def _get_downloadable_file(self, file_id: int, user: User) -> File:
+        """Get a file record, checking the user may download it"""
+        file_record = await self.get_file_by_id(file_id)
+        if not file_record:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found"
+            )
+        
+        if not await self._has_download_permission(file_record, user):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have permission to download this file"
+            )
+        
+        return file_record
+    
+    async def _has_download_permission(self, file: File, user: User) -> bool:
         """Check if user has permission to download file"""
         # Owner always has access
         if file.owner_id == user.id:
             return True
         
         # Admin has access to all files
-        if user.role and user.role.name == "admin":
+        if user.is_admin:
             return True
         
         # Check file permissions
-        permission = self.db.query(FilePermission).filter(
-            FilePermission.file_id == file.id,
-            FilePermission.user_id == user.id,
-            FilePermission.can_download == True
-        ).first()
-        
-        return permission is not None
+        result = await self.db.execute(
+            select(self._permission_exists(file.id, user.id, download=True))
+        )
+        return result.scalar()
     
-    def update_file(
+    async def update_file(
         self,
         file_id: int,
         file_data: FileUpdate,
@@ -224,7 +354,7 @@ class FileService:
         request: Optional[Request] = None
     ) -> File:
         """Update file metadata"""
-        file_record = self.get_file_by_id(file_id)
+        file_record = await self.get_file_by_id(file_id)
         if not file_record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -233,7 +363,7 @@ class FileService:
         
         # Check ownership or admin
         if file_record.owner_id != user.id:
-            if not user.role or user.role.name != "admin":
+            if not user.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You don't have permission to update this file"
@@ -244,11 +374,11 @@ class FileService:
         for field, value in update_data.items():
             setattr(file_record, field, value)
         
-        self.db.commit()
-        self.db.refresh(file_record)
+        await self.db.commit()
+        await self.db.refresh(file_record)
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.FILE_UPDATE,
             user_id=user.id,
             user_email=user.email,
@@ -260,14 +390,14 @@ class FileService:
         
         return file_record
     
-    def delete_file(
+    async def delete_file(
         self,
         file_id: int,
         user: User,
         request: Optional[Request] = None
     ) -> bool:
         """Soft delete file"""
-        file_record = self.get_file_by_id(file_id)
+        file_record = await self.get_file_by_id(file_id)
         if not file_record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -276,7 +406,7 @@ class FileService:
         
         # Check ownership or admin
         if file_record.owner_id != user.id:
-            if not user.role or user.role.name != "admin":
+            if not user.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You don't have permission to delete this file"
@@ -284,13 +414,13 @@ class FileService:
         
         # Soft delete
         file_record.is_deleted = True
-        self.db.commit()
+        await self.db.commit()
         
         # Optionally delete from S3
         # self.s3.delete_file(file_record.s3_key)
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.FILE_DELETE,
             user_id=user.id,
             user_email=user.email,
@@ -302,7 +432,7 @@ class FileService:
         
         return True
     
-    def grant_permission(
+    async def grant_permission(
         self,
         file_id: int,
         permission_data: FilePermissionCreate,
@@ -310,7 +440,7 @@ class FileService:
         request: Optional[Request] = None
     ) -> FilePermission:
         """Grant file permission to a user"""
-        file_record = self.get_file_by_id(file_id)
+        file_record = await self.get_file_by_id(file_id)
         if not file_record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -319,29 +449,14 @@ class FileService:
         
         # Check if user can grant permissions
         if file_record.owner_id != granting_user.id:
-            if not granting_user.role or granting_user.role.name != "admin":
+            if not granting_user.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You don't have permission to share this file"
                 )
         
-        # Check if permission already exists
-        existing = self.db.query(FilePermission).filter(
-            FilePermission.file_id == file_id,
-            FilePermission.user_id == permission_data.user_id
-        ).first()
-        
-        if existing:
-            # Update existing permission
-            existing.permission_level = permission_data.permission_level
-            existing.can_download = permission_data.can_download
-            existing.can_share = permission_data.can_share
-            self.db.commit()
-            self.db.refresh(existing)
-            return existing
-        
-        # Create new permission
-        permission = FilePermission(
+        # Create the grant, or update the existing one, in one statement
+        stmt = dialect_insert(self.db, FilePermission).values(
             file_id=file_id,
             user_id=permission_data.user_id,
             permission_level=PermissionLevel(permission_data.permission_level.value),
@@ -349,13 +464,25 @@ class FileService:
             can_share=permission_data.can_share,
             granted_by_id=granting_user.id
         )
-        
-        self.db.add(permission)
-        self.db.commit()
-        self.db.refresh(permission)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FilePermission.file_id, FilePermission.user_id],
+            set_={
+                "permission_level": stmt.excluded.permission_level,
+                "can_download": stmt.excluded.can_download,
+                "can_share": stmt.excluded.can_share,
+                "updated_at": func.now()
+            }
+        ).returning(FilePermission)
+        
+        result = await self.db.execute(
+            stmt,
+            execution_options={"populate_existing": True}
+        )
+        permission = result.scalar_one()
+        await self.db.commit()
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.PERMISSION_GRANT,
             user_id=granting_user.id,
             user_email=granting_user.email,
@@ -367,7 +494,7 @@ class FileService:
         
         return permission
     
-    def revoke_permission(
+    async def revoke_permission(
         self,
         file_id: int,
         user_id: int,
@@ -375,7 +502,7 @@ class FileService:
         request: Optional[Request] = None
     ) -> bool:
         """Revoke file permission from a user"""
-        file_record = self.get_file_by_id(file_id)
+        file_record = await self.get_file_by_id(file_id)
         if not file_record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -384,16 +511,19 @@ class FileService:
         
         # Check if user can revoke permissions
         if file_record.owner_id != revoking_user.id:
-            if not revoking_user.role or revoking_user.role.name != "admin":
+            if not revoking_user.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You don't have permission to revoke access"
                 )
         
-        permission = self.db.query(FilePermission).filter(
-            FilePermission.file_id == file_id,
-            FilePermission.user_id == user_id
-        ).first()
+        result = await self.db.execute(
+            select(FilePermission).where(
+                FilePermission.file_id == file_id,
+                FilePermission.user_id == user_id
+            )
+        )
+        permission = result.scalars().first()
         
         if not permission:
             raise HTTPException(
@@ -401,11 +531,11 @@ class FileService:
                 detail="Permission not found"
             )
         
-        self.db.delete(permission)
-        self.db.commit()
+        await self.db.delete(permission)
+        await self.db.commit()
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.PERMISSION_REVOKE,
             user_id=revoking_user.id,
             user_email=revoking_user.email,
@@ -417,13 +547,19 @@ class FileService:
         
         return True
     
-    def get_file_permissions(self, file_id: int) -> List[FilePermission]:
-        """Get all permissions for a file"""
-        return self.db.query(FilePermission).filter(
-            FilePermission.file_id == file_id
-        ).all()
+    async def get_file_permissions(self, file_id: int) -> List[FilePermission]:
+        """Get all permissions for a file (grantee user eagerly joined)"""
+        result = await self.db.execute(
+            select(FilePermission).options(
+                joinedload(FilePermission.user),
+                raiseload('*')
+            ).where(
+                FilePermission.file_id == file_id
+            )
+        )
+        return result.scalars().all()
 
 
-def get_file_service(db: Session) -> FileService:
+def get_file_service(db: AsyncSession) -> FileService:
     """Factory function for FileService"""
     return FileService(db)
@@ -0,0 +1,85 @@
+"""
+Role Caches
+Roles are only ever added, so a role's id and name never change:
+- an in-process name -> id map for lookups on the request path
+- a Redis cache of the role listing, dropped when roles are created
+"""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Dict, Any
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.models.role import Role
+
+
+ROLES_CACHE_KEY = "roles:list"
+
+# Only roles found in the database are remembered, so new roles are
+# picked up on first use without any cross-worker invalidation
+_role_ids: Dict[str, int] = {}
+
+
+async def get_role_id(db: AsyncSession, name: str) -> Optional[int]:
+    """
+    Get a role's id by name
+    
+    Returns:
+        Role id, or None if no such role exists
+    """
+    role_id = _role_ids.get(name)
+    if role_id is None:
+        result = await db.execute(select(Role.id).where(Role.name == name))
+        role_id = result.scalar_one_or_none()
+        if role_id is not None:
+            _role_ids[name] = role_id
+    return role_id
+
+
+async def role_exists(db: AsyncSession, role_id: int) -> bool:
+    """Check a role id exists"""
+    if role_id in _role_ids.values():
+        return True
+    result = await db.execute(select(Role.name).where(Role.id == role_id))
+    name = result.scalar_one_or_none()
+    if name is None:
+        return False
+    _role_ids[name] = role_id
+    return True
+
+
+async def load_role_ids(db: AsyncSession) -> None:
+    """Prime the name -> id map with every role (e.g. at startup)"""
+    result = await db.execute(select(Role.name, Role.id))
+    _role_ids.update(result.tuples().all())
+
+
+def clear_role_ids() -> None:
+    """Forget cached role ids (e.g. after the roles table is recreated)"""
+    _role_ids.clear()
+
+
+async def get_cached_roles() -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the cached role listing
+
+    Returns:
+        List of role dicts (timestamps as ISO strings), or None on a miss
+        or when disabled
+    """
+    if settings.ROLES_CACHE_TTL_SECONDS <= 0:
+        return None
+    return await redis_client.get(ROLES_CACHE_KEY)
+
+
+async def cache_roles(roles: List[Dict[str, Any]]) -> None:
+    """Cache the role listing (rows from the roles table)"""
+    if settings.ROLES_CACHE_TTL_SECONDS <= 0:
+        return
+    await redis_client.set_with_expiry(ROLES_CACHE_KEY, roles, settings.ROLES_CACHE_TTL_SECONDS)
+
+
+async def invalidate_roles() -> None:
+    """Drop the cached listing after roles are added or changed"""
+    await redis_client.delete(ROLES_CACHE_KEY)
@@ -6,9 +6,10 @@ Uses Redis for TTL-based expiration
 
 import uuid
 import json
-import bcrypt
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, raiseload
 from typing import Optional, Dict
 from fastapi import HTTPException, status, Request
 
@@ -18,6 +19,7 @@ from app.models.user import User
 from app.schemas.share import ShareLinkCreate, ShareLinkInfo
 from app.core.redis import redis_client
 from app.core.config import settings
+from app.security.password import hash_password_async, verify_password_async
 from app.services.audit_service import AuditService
 from app.models.audit_log import AuditAction
 
@@ -27,7 +29,7 @@ class ShareLinkService:
     
     REDIS_PREFIX = "share_link:"
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.redis = redis_client
         self.audit_service = AuditService(db)
@@ -36,15 +38,7 @@ class ShareLinkService:
         """Generate unique share token"""
         return uuid.uuid4().hex
     
-    def _hash_password(self, password: str) -> str:
-        """Hash password using bcrypt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    
-    def _verify_password(self, password: str, password_hash: str) -> bool:
-        """Verify password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
-    
-    def create_share_link(
+    async def create_share_link(
         self,
         link_data: ShareLinkCreate,
         user: User,
@@ -52,10 +46,13 @@ class ShareLinkService:
     ) -> Dict:
         """Create a new expiring share link"""
         # Get file
-        file = self.db.query(File).filter(
-            File.id == link_data.file_id,
-            File.is_deleted == False
-        ).first()
+        result = await self.db.execute(
+            select(File).where(
+                File.id == link_data.file_id,
+                File.is_deleted == False
+            )
+        )
+        file = result.scalars().first()
         
         if not file:
             raise HTTPException(
@@ -65,7 +62,7 @@ class ShareLinkService:
         
         # Check if user owns the file or is admin
         if file.owner_id != user.id:
-            if not user.role or user.role.name != "admin":
+            if not user.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You don't have permission to share this file"
@@ -74,12 +71,13 @@ class ShareLinkService:
         # Generate token and expiry
         token = self._generate_token()
         expiry_seconds = link_data.expiry_minutes * 60
-        expires_at = datetime.utcnow() + timedelta(minutes=link_data.expiry_minutes)
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(minutes=link_data.expiry_minutes)
         
         # Hash password if provided
         password_hash = None
         if link_data.password:
-            password_hash = self._hash_password(link_data.password)
+            password_hash = await hash_password_async(link_data.password)
         
         # Store in Redis with TTL
         redis_data = {
@@ -89,7 +87,7 @@ class ShareLinkService:
             "size": file.size,
             "s3_key": file.s3_key,
             "created_by": user.id,
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": now.isoformat(),
             "expires_at": expires_at.isoformat(),
             "max_downloads": link_data.max_downloads,
             "download_count": 0,
@@ -99,7 +97,7 @@ class ShareLinkService:
         }
         
         redis_key = f"{self.REDIS_PREFIX}{token}"
-        success = self.redis.set_with_expiry(redis_key, redis_data, expiry_seconds)
+        success = await self.redis.set_with_expiry(redis_key, redis_data, expiry_seconds)
         
         if not success:
             raise HTTPException(
@@ -120,11 +118,11 @@ class ShareLinkService:
         )
         
         self.db.add(share_link)
-        self.db.commit()
-        self.db.refresh(share_link)
+        await self.db.commit()
+        await self.db.refresh(share_link)
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.SHARE_CREATE,
             user_id=user.id,
             user_email=user.email,
@@ -147,23 +145,14 @@ class ShareLinkService:
             "created_at": share_link.created_at
         }
     
-    def _get_share_data(self, token: str) -> Optional[Dict]:
-        """Get share link data from Redis or database without validation"""
-        redis_key = f"{self.REDIS_PREFIX}{token}"
-        data = self.redis.get(redis_key)
-        
-        if not data:
-            # Check database as fallback (link might have expired)
-            db_link = self.db.query(ShareLink).filter(
-                ShareLink.token == token
-            ).first()
-            
-            if db_link:
-                if not db_link.is_valid:
-                    return None
-            return None
+    async def _get_share_data(self, token: str) -> Optional[Dict]:
+        """
+        Get share link data from Redis without validation
         
-        return data
+        The Redis record expires with the link, so a miss means the link is
+        expired or unknown (the database row is only kept as a record).
+        """
+        return await self.redis.get(f"{self.REDIS_PREFIX}{token}")
     
     def _is_download_limit_reached(self, data: Dict) -> bool:
         """Check if download limit has been reached"""
@@ -172,9 +161,9 @@ class ShareLinkService:
                 return True
         return False
     
-    def validate_share_link(self, token: str) -> Optional[Dict]:
+    async def validate_share_link(self, token: str) -> Optional[Dict]:
         """Validate a share link and return file info if valid"""
-        data = self._get_share_data(token)
+        data = await self._get_share_data(token)
         
         if not data:
             return None
@@ -185,10 +174,10 @@ class ShareLinkService:
         
         return data
     
-    def get_share_link_info(self, token: str) -> ShareLinkInfo:
+    async def get_share_link_info(self, token: str) -> ShareLinkInfo:
         """Get detailed information about a share link"""
         # First get raw data to check specific error conditions
-        data = self._get_share_data(token)
+        data = await self._get_share_data(token)
         
         if not data:
             raise HTTPException(
@@ -216,35 +205,39 @@ class ShareLinkService:
             has_password=data.get("password_hash") is not None
         )
     
-    def increment_download_count(self, token: str) -> bool:
-        """Increment download count for a share link"""
+    async def increment_download_count(self, token: str) -> bool:
+        """
+        Increment download count for a share link
+        The Redis limit check and increment run as one atomic script, so
+        concurrent downloads cannot exceed max_downloads
+        """
         redis_key = f"{self.REDIS_PREFIX}{token}"
-        data = self.redis.get(redis_key)
-        
-        if not data:
-            return False
-        
-        # Get remaining TTL
-        ttl = self.redis.get_ttl(redis_key)
-        if ttl <= 0:
-            return False
+        count = await self.redis.claim_download(redis_key)
         
-        # Update download count
-        data["download_count"] = data.get("download_count", 0) + 1
-        self.redis.set_with_expiry(redis_key, data, ttl)
+        if count is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Share link not found or expired"
+            )
         
-        # Also update in database
-        db_link = self.db.query(ShareLink).filter(
-            ShareLink.token == token
-        ).first()
+        if count == 0:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Download limit reached. Contact the file owner."
+            )
         
-        if db_link:
-            db_link.download_count += 1
-            self.db.commit()
+        # Mirror in the database: one atomic UPDATE, so concurrent
+        # downloads never overwrite each other's increment
+        await self.db.execute(
+            update(ShareLink).where(ShareLink.token == token).values(
+                download_count=ShareLink.download_count + 1
+            )
+        )
+        await self.db.commit()
         
         return True
     
-    def download_via_share_link(
+    async def download_via_share_link(
         self,
         token: str,
         password: Optional[str] = None,
@@ -256,7 +249,7 @@ class ShareLinkService:
         Returns file info for streaming
         """
         # First get raw data to check specific error conditions
-        data = self._get_share_data(token)
+        data = await self._get_share_data(token)
         
         if not data:
             raise HTTPException(
@@ -278,7 +271,7 @@ class ShareLinkService:
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Password required to access this file"
                 )
-            if not self._verify_password(password, data["password_hash"]):
+            if not await verify_password_async(password, data["password_hash"]):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid password"
@@ -300,10 +293,10 @@ class ShareLinkService:
                 )
         
         # Increment download count
-        self.increment_download_count(token)
+        await self.increment_download_count(token)
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.SHARE_ACCESS,
             user_id=user.id if user else None,
             user_email=user.email if user else None,
@@ -317,10 +310,11 @@ class ShareLinkService:
             "file_id": data["file_id"],
             "filename": data["filename"],
             "content_type": data["content_type"],
+            "size": data["size"],
             "s3_key": data["s3_key"]
         }
     
-    def revoke_share_link(
+    async def revoke_share_link(
         self,
         token: str,
         user: User,
@@ -328,9 +322,10 @@ class ShareLinkService:
     ) -> bool:
         """Revoke/delete a share link"""
         # Check ownership
-        db_link = self.db.query(ShareLink).filter(
-            ShareLink.token == token
-        ).first()
+        result = await self.db.execute(
+            select(ShareLink).where(ShareLink.token == token)
+        )
+        db_link = result.scalars().first()
         
         if not db_link:
             raise HTTPException(
@@ -339,7 +334,7 @@ class ShareLinkService:
             )
         
         if db_link.created_by_id != user.id:
-            if not user.role or user.role.name != "admin":
+            if not user.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You don't have permission to revoke this link"
@@ -347,14 +342,14 @@ class ShareLinkService:
         
         # Delete from Redis
         redis_key = f"{self.REDIS_PREFIX}{token}"
-        self.redis.delete(redis_key)
+        await self.redis.delete(redis_key)
         
         # Update database
         db_link.is_active = False
-        self.db.commit()
+        await self.db.commit()
         
         # Log audit event
-        self.audit_service.log(
+        await self.audit_service.log(
             action=AuditAction.SHARE_REVOKE,
             user_id=user.id,
             user_email=user.email,
@@ -366,19 +361,25 @@ class ShareLinkService:
         
         return True
     
-    def get_user_share_links(
+    async def get_user_share_links(
         self,
         user_id: int,
         skip: int = 0,
         limit: int = 100
     ):
         """Get share links created by user"""
-        return self.db.query(ShareLink).filter(
-            ShareLink.created_by_id == user_id,
-            ShareLink.is_active == True
-        ).offset(skip).limit(limit).all()
+        result = await self.db.execute(
+            select(ShareLink).options(
+                selectinload(ShareLink.file),
+                raiseload('*')
+            ).where(
+                ShareLink.created_by_id == user_id,
+                ShareLink.is_active == True
+            ).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
 
 
-def get_share_link_service(db: Session) -> ShareLinkService:
+def get_share_link_service(db: AsyncSession) -> ShareLinkService:
     """Factory function for ShareLinkService"""
     return ShareLinkService(db)
@@ -3,59 +3,84 @@ User Service
 Business logic for user management
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import Optional, List
 from fastapi import HTTPException, status
 
-from app.models.user import User
 from app.models.role import Role
+from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserRoleUpdate
-from app.security.password import hash_password, verify_password
+from app.security.password import hash_password_async, verify_password_async
+from app.security.user_cache import invalidate_user
+from app.services.role_cache import get_role_id, role_exists
 
 
 class UserService:
     """Service for user-related operations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
-        return self.db.query(User).filter(User.id == user_id).first()
+        result = await self.db.execute(
+            select(User).options(joinedload(User.role)).where(User.id == user_id)
+        )
+        return result.scalars().first()
     
-    def get_user_by_email(self, email: str) -> Optional[User]:
+    async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        return self.db.query(User).filter(User.email == email).first()
+        result = await self.db.execute(
+            select(User).options(joinedload(User.role)).where(User.email == email)
+        )
+        return result.scalars().first()
     
-    def get_users(
+    async def get_users(
         self,
         skip: int = 0,
         limit: int = 100,
         is_active: Optional[bool] = None
-    ) -> List[User]:
-        """Get list of users with pagination"""
-        query = self.db.query(User)
+    ) -> List[RowMapping]:
+        """
+        Get list of users with pagination
+        
+        Returns:
+            Rows with only the listing columns (role name as ``role_name``)
+        """
+        stmt = select(
+            User.id,
+            User.email,
+            User.full_name,
+            User.is_active,
+            Role.name.label("role_name"),
+            User.created_at
+        ).outerjoin(User.role)
         
         if is_active is not None:
-            query = query.filter(User.is_active == is_active)
+            stmt = stmt.where(User.is_active == is_active)
         
-        return query.offset(skip).limit(limit).all()
+        result = await self.db.execute(stmt.offset(skip).limit(limit))
+        return result.mappings().all()
     
-    def get_users_count(self, is_active: Optional[bool] = None) -> int:
+    async def get_users_count(self, is_active: Optional[bool] = None) -> int:
         """Get total count of users"""
-        query = self.db.query(User)
+        stmt = select(func.count(User.id))
         if is_active is not None:
-            query = query.filter(User.is_active == is_active)
-        return query.count()
+            stmt = stmt.where(User.is_active == is_active)
+        result = await self.db.execute(stmt)
+        return result.scalar_one()
     
-    def create_user(
+    async def create_user(
         self,
         user_data: UserCreate,
         role_name: str = "user"
     ) -> User:
         """Create a new user"""
         # Check if user already exists
-        existing_user = self.get_user_by_email(user_data.email)
+        existing_user = await self.get_user_by_email(user_data.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -63,27 +88,27 @@ class UserService:
             )
         
         # Get role
-        role = self.db.query(Role).filter(Role.name == role_name).first()
+        role_id = await get_role_id(self.db, role_name)
         
         # Create user
         user = User(
             email=user_data.email,
-            hashed_password=hash_password(user_data.password),
+            hashed_password=await hash_password_async(user_data.password),
             full_name=user_data.full_name,
-            role_id=role.id if role else None,
+            role_id=role_id,
             is_active=True,
             is_verified=False
         )
         
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await user.awaitable_attrs.role
         
         return user
     
-    def update_user(self, user_id: int, user_data: UserUpdate) -> User:
+    async def update_user(self, user_id: int, user_data: UserUpdate) -> User:
         """Update user information"""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -94,46 +119,48 @@ class UserService:
         for field, value in update_data.items():
             setattr(user, field, value)
         
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await invalidate_user(user_id)
+        await self.db.refresh(user)
         
         return user
     
-    def update_user_role(
+    async def update_user_role(
         self,
         user_id: int,
         role_data: UserRoleUpdate,
         admin_user: User
     ) -> User:
         """Update user's role (admin only)"""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        role = self.db.query(Role).filter(Role.id == role_data.role_id).first()
-        if not role:
+        if not await role_exists(self.db, role_data.role_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Role not found"
             )
         
-        user.role_id = role.id
-        self.db.commit()
-        self.db.refresh(user)
+        user.role_id = role_data.role_id
+        await self.db.commit()
+        await invalidate_user(user_id)
+        await self.db.refresh(user)
+        await self.db.refresh(user, ["role"])
         
         return user
     
-    def change_password(
+    async def change_password(
         self,
         user_id: int,
         current_password: str,
         new_password: str
     ) -> bool:
         """Change user password"""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -141,21 +168,22 @@ class UserService:
             )
         
         # Verify current password
-        if not verify_password(current_password, user.hashed_password):
+        if not await verify_password_async(current_password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
         # Update password
-        user.hashed_password = hash_password(new_password)
-        self.db.commit()
+        user.hashed_password = await hash_password_async(new_password)
+        await self.db.commit()
+        await invalidate_user(user_id)
         
         return True
     
-    def delete_user(self, user_id: int) -> bool:
+    async def delete_user(self, user_id: int) -> bool:
         """Soft delete user (deactivate)"""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -163,25 +191,27 @@ class UserService:
             )
         
         user.is_active = False
-        self.db.commit()
+        await self.db.commit()
+        await invalidate_user(user_id)
         
         return True
     
-    def hard_delete_user(self, user_id: int) -> bool:
+    async def hard_delete_user(self, user_id: int) -> bool:
         """Permanently delete user"""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        self.db.delete(user)
-        self.db.commit()
+        await self.db.delete(user)
+        await self.db.commit()
+        await invalidate_user(user_id)
         
         return True
 
 
-def get_user_service(db: Session) -> UserService:
+def get_user_service(db: AsyncSession) -> UserService:
     """Factory function for UserService"""
     return UserService(db)
@@ -2,8 +2,11 @@
 Logging Configuration
 """
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from app.core.config import settings
 
 # Create logger
@@ -21,8 +24,14 @@ formatter = logging.Formatter(
 )
 console_handler.setFormatter(formatter)
 
+# Callers only enqueue records; a listener thread formats and writes them
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+queue_listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+queue_listener.start()
+atexit.register(queue_listener.stop)
+
 # Add handler
-logger.addHandler(console_handler)
+logger.addHandler(QueueHandler(log_queue))
 
 
 def get_logger(name: str = None):
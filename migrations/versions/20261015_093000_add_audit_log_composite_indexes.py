@@ -0,0 +1,60 @@
+"""add audit_logs composite indexes
+
+Revision ID: 5b7e2c1d9a43
+Revises: 934c762708d0
+Create Date: 2026-10-15 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c1d9a43'
+down_revision: Union[str, None] = '934c762708d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_audit_logs_user_created',
+            'audit_logs',
+            ['user_id', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_audit_logs_resource_created',
+            'audit_logs',
+            ['resource_type', 'resource_id', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_audit_logs_action_created',
+            'audit_logs',
+            ['action', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_audit_logs_status_failed',
+            'audit_logs',
+            ['status', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_where=sa.text("status <> 'success'"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_audit_logs_status_failed', table_name='audit_logs', postgresql_concurrently=True)
+        op.drop_index('ix_audit_logs_action_created', table_name='audit_logs', postgresql_concurrently=True)
+        op.drop_index('ix_audit_logs_resource_created', table_name='audit_logs', postgresql_concurrently=True)
+        op.drop_index('ix_audit_logs_user_created', table_name='audit_logs', postgresql_concurrently=True)
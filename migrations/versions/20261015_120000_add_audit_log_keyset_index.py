@@ -0,0 +1,35 @@
+"""add audit_logs keyset pagination index
+
+Revision ID: 8d2f6a1c4e70
+Revises: 5b7e2c1d9a43
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6a1c4e70'
+down_revision: Union[str, None] = '5b7e2c1d9a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_audit_logs_created_id',
+            'audit_logs',
+            [sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_audit_logs_created_id', table_name='audit_logs', postgresql_concurrently=True)
@@ -0,0 +1,26 @@
+"""add checksum_sha256 to files
+
+Revision ID: c41e9b7a2f05
+Revises: 8d2f6a1c4e70
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e9b7a2f05'
+down_revision: Union[str, None] = '8d2f6a1c4e70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('checksum_sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'checksum_sha256')
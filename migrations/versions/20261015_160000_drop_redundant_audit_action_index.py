@@ -0,0 +1,34 @@
+"""drop redundant audit_logs action index
+
+Revision ID: e7a3d5b90c12
+Revises: c41e9b7a2f05
+Create Date: 2026-10-15 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3d5b90c12'
+down_revision: Union[str, None] = 'c41e9b7a2f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ix_audit_logs_action_created (action, created_at DESC) serves the same lookups
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_audit_logs_action', table_name='audit_logs', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_audit_logs_action',
+            'audit_logs',
+            ['action'],
+            unique=False,
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,59 @@
+"""store audit_logs.action as varchar with a check constraint
+
+Revision ID: 3f9c1e6b8d24
+Revises: e7a3d5b90c12
+Create Date: 2026-10-15 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1e6b8d24'
+down_revision: Union[str, None] = 'e7a3d5b90c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+AUDIT_ACTIONS = (
+    'login_success', 'login_failed', 'logout', 'token_refresh', 'password_change',
+    'password_reset_request',
+    'user_create', 'user_update', 'user_delete', 'role_assign',
+    'file_upload', 'file_download', 'file_delete', 'file_update',
+    'share_create', 'share_access', 'share_revoke',
+    'permission_grant', 'permission_revoke',
+)
+
+
+def upgrade() -> None:
+    # lower() also normalizes rows written as enum names (LOGIN_SUCCESS)
+    # by databases that were created with create_all
+    op.alter_column(
+        'audit_logs',
+        'action',
+        type_=sa.String(length=32),
+        existing_nullable=False,
+        postgresql_using='lower(action::text)'
+    )
+    op.execute('DROP TYPE IF EXISTS auditaction')
+    op.create_check_constraint(
+        'ck_audit_logs_action',
+        'audit_logs',
+        sa.column('action').in_(AUDIT_ACTIONS)
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('ck_audit_logs_action', 'audit_logs', type_='check')
+    auditaction = sa.Enum(*AUDIT_ACTIONS, name='auditaction')
+    auditaction.create(op.get_bind())
+    op.alter_column(
+        'audit_logs',
+        'action',
+        type_=auditaction,
+        existing_nullable=False,
+        postgresql_using='action::auditaction'
+    )
@@ -0,0 +1,42 @@
+"""add share_links file and creator indexes
+
+Revision ID: abaee16db5bc
+Revises: 3f9c1e6b8d24
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'abaee16db5bc'
+down_revision: Union[str, None] = '3f9c1e6b8d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_share_links_file_active_exp',
+            'share_links',
+            ['file_id', 'is_active', 'expires_at'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            op.f('ix_share_links_created_by_id'),
+            'share_links',
+            ['created_by_id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_share_links_created_by_id'), table_name='share_links', postgresql_concurrently=True)
+        op.drop_index('ix_share_links_file_active_exp', table_name='share_links', postgresql_concurrently=True)
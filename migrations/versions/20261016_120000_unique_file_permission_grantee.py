@@ -0,0 +1,45 @@
+"""unique file_permissions (file_id, user_id)
+
+Revision ID: aa2256e0f38d
+Revises: abaee16db5bc
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'aa2256e0f38d'
+down_revision: Union[str, None] = 'abaee16db5bc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep only the highest-id (latest inserted) grant per (file, user) so the
+    # unique index can build
+    op.execute(
+        """
+        DELETE FROM file_permissions p
+        USING file_permissions newer
+        WHERE p.file_id = newer.file_id
+          AND p.user_id = newer.user_id
+          AND p.id < newer.id
+        """
+    )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_file_permissions_file_user',
+            'file_permissions',
+            ['file_id', 'user_id'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_file_permissions_file_user', table_name='file_permissions', postgresql_concurrently=True)
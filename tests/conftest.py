@@ -2,38 +2,75 @@
 Test Configuration and Fixtures
 """
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import sys
 import os
+import tempfile
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.config import settings
+from app.core.database import Base, get_db, engine as app_engine
 from app.models.role import Role
 from app.models.user import User
+from app.models.file import File
 from app.security.password import hash_password
+from app.services.role_cache import clear_role_ids
 
-# Test database URL (in-memory SQLite)
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Test database (file-backed SQLite shared by the sync fixtures and the async app)
+TEST_DB_PATH = os.path.join(tempfile.gettempdir(), "secure_file_sharing_test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    poolclass=NullPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Each TestClient runs its own event loop, so async connections are not pooled
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Write audit logs inline so tests can read them back immediately
+settings.AUDIT_LOG_BATCHING = False
+# User and role ids repeat across tests (fresh DB each time), so skip the Redis caches
+settings.USER_CACHE_TTL_SECONDS = 0
+settings.ROLES_CACHE_TTL_SECONDS = 0
+
+
+@pytest.fixture(scope="session", autouse=True)
+def app_schema():
+    """
+    Create tables in the app's own database, which startup seeds roles into
+    (deployments run ``alembic upgrade head`` instead)
+    """
+    async def create_tables():
+        async with app_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await app_engine.dispose()
+    
+    asyncio.run(create_tables())
+
 
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database session for each test"""
     Base.metadata.create_all(bind=engine)
+    clear_role_ids()
     db = TestingSessionLocal()
     
     # Create default roles
@@ -55,11 +92,9 @@ def db_session():
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create a test client with overridden database dependency"""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
     
     app.dependency_overrides[get_db] = override_get_db
     
@@ -105,6 +140,24 @@ def test_admin(db_session):
     return admin
 
 
+@pytest.fixture
+def other_user(db_session):
+    """Create a second regular user with no access to test_user's files"""
+    user_role = db_session.query(Role).filter(Role.name == "user").first()
+    user = User(
+        email="otheruser@example.com",
+        hashed_password=hash_password("OtherPassword123"),
+        full_name="Other User",
+        role_id=user_role.id,
+        is_active=True,
+        is_verified=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
 @pytest.fixture
 def user_token(client, test_user):
     """Get auth token for test user"""
@@ -129,3 +182,40 @@ def admin_token(client, test_admin):
         }
     )
     return response.json()["tokens"]["access_token"]
+
+
+@pytest.fixture
+def test_file(db_session, test_user):
+    """Create a file record owned by the test user (no S3 object)"""
+    file = File(
+        filename="report.pdf",
+        original_filename="report.pdf",
+        content_type="application/pdf",
+        size=1024,
+        s3_key=f"files/{test_user.id}/report.pdf",
+        s3_bucket="test-bucket",
+        owner_id=test_user.id
+    )
+    db_session.add(file)
+    db_session.commit()
+    db_session.refresh(file)
+    return file
+
+
+@pytest.fixture
+def other_user_token(client, other_user):
+    """Get auth token for the second user"""
+    response = client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": "otheruser@example.com",
+            "password": "OtherPassword123"
+        }
+    )
+    return response.json()["tokens"]["access_token"]
+
+
+@pytest.fixture
+def presigned_downloads(monkeypatch):
+    """Answer downloads with a redirect to a presigned S3 URL"""
+    monkeypatch.setattr(settings, "S3_PRESIGNED_DOWNLOADS", True)
@@ -3,6 +3,13 @@ Audit Log API Tests
 """
 
 import pytest
+import asyncio
+from sqlalchemy import select
+
+from app.core.redis import RedisClient
+from app.models.audit_log import AuditLog, AuditAction
+from app.services.audit_sink import AuditSink, AUDIT_QUEUE_KEY
+from tests.conftest import TestingAsyncSessionLocal
 
 
 class TestAuditEndpoints:
@@ -19,6 +26,39 @@ class TestAuditEndpoints:
         assert "items" in data
         assert "total" in data
     
+    def test_log_records_forwarded_ip(self, client, db_session):
+        """Test the first X-Forwarded-For hop and the user agent are logged"""
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "nobody@example.com", "password": "Password123"},
+            headers={"X-Forwarded-For": "203.0.113.7, 10.0.0.1", "User-Agent": "audit-test"}
+        )
+        assert response.status_code == 401
+        
+        log = db_session.query(AuditLog).filter(
+            AuditLog.action == AuditAction.LOGIN_FAILED
+        ).one()
+        assert log.ip_address == "203.0.113.7"
+        assert log.user_agent == "audit-test"
+    
+    def test_large_unfiltered_listing_reports_estimate(self, client, admin_token, monkeypatch):
+        """Test unfiltered listings of a large table use the estimated total"""
+        from app.services.audit_service import AuditService
+        
+        async def estimate(self):
+            return 5_000_000
+        
+        monkeypatch.setattr(AuditService, "get_logs_estimated_count", estimate)
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        
+        response = client.get("/api/v1/audit/", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["total"] == 5_000_000
+        
+        # Filtered listings still count exactly
+        response = client.get("/api/v1/audit/?status=failed", headers=headers)
+        assert response.json()["total"] == 0
+    
     def test_get_audit_logs_as_user_forbidden(self, client, user_token):
         """Test that regular user cannot access audit logs"""
         response = client.get(
@@ -45,6 +85,31 @@ class TestAuditEndpoints:
         assert response.status_code == 200
         assert isinstance(response.json(), list)
     
+    def test_file_audit_history_streams_every_row(self, client, admin_token, db_session):
+        """Test the streamed file history returns every row newest first"""
+        from app.services.audit_service import AuditService
+        
+        db_session.add_all([
+            AuditLog(action=AuditAction.FILE_DOWNLOAD, resource_type="file", resource_id=42)
+            for _ in range(5)
+        ])
+        db_session.commit()
+        
+        response = client.get(
+            "/api/v1/audit/file/42",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 200
+        ids = [log["id"] for log in response.json()]
+        assert len(ids) == 5 and ids == sorted(ids, reverse=True)
+        
+        async def batches():
+            async with TestingAsyncSessionLocal() as db:
+                service = AuditService(db)
+                return [len(logs) async for logs in service.stream_file_history(42, batch_size=2)]
+        
+        assert asyncio.run(batches()) == [2, 2, 1]
+    
     def test_get_file_audit_history_as_user_forbidden(self, client, user_token):
         """Test that regular user cannot access file audit history"""
         response = client.get(
@@ -69,3 +134,202 @@ class TestAuditEndpoints:
             headers={"Authorization": f"Bearer {admin_token}"}
         )
         assert response.status_code == 200
+    
+    def test_audit_logs_list_every_action(self, client, admin_token, db_session):
+        """Test every stored action value can be listed and filtered on"""
+        db_session.add(AuditLog(action=AuditAction.PASSWORD_RESET_REQUEST, status="success"))
+        db_session.commit()
+        
+        response = client.get(
+            "/api/v1/audit/?action=password_reset_request",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 200
+        assert [item["action"] for item in response.json()["items"]] == ["password_reset_request"]
+    
+    def test_audit_logs_total_matches_filters(self, client, admin_token, user_token):
+        """Test that total counts every matching row, not just the page"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = client.get(
+            "/api/v1/audit/?action=login_success&limit=1",
+            headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) == 1
+        assert data["total"] == 2
+        
+        # Page past the end still reports the total
+        response = client.get(
+            "/api/v1/audit/?action=login_success&skip=10&limit=1",
+            headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["items"] == []
+        assert data["total"] == 2
+    
+    def test_audit_sink_flushes_queued_entries(self, db_session):
+        """Test that the audit sink writes queued entries in a batch on stop"""
+        async def run():
+            sink = AuditSink(batch_size=2, flush_interval=0.01)
+            await sink.start(TestingAsyncSessionLocal)
+            for i in range(3):
+                assert await sink.submit({
+                    "action": AuditAction.FILE_DOWNLOAD,
+                    "resource_type": "file",
+                    "resource_id": i,
+                    "status": "success"
+                })
+            await sink.stop()
+            assert await sink.submit({"action": AuditAction.LOGOUT}) is False
+        
+        asyncio.run(run())
+        
+        logs = db_session.query(AuditLog).order_by(AuditLog.id).all()
+        assert [log.resource_id for log in logs] == [0, 1, 2]
+    
+    def test_audit_sink_drops_only_failing_row(self, db_session):
+        """Test that one bad row in a batch does not lose the rest"""
+        async def run():
+            sink = AuditSink(batch_size=3, flush_interval=0.01)
+            await sink.start(TestingAsyncSessionLocal)
+            try:
+                for action in (AuditAction.FILE_DOWNLOAD, "not-an-action", AuditAction.FILE_DOWNLOAD):
+                    assert await sink.submit({"action": action, "status": "success"})
+                return await sink._write([
+                    {"action": AuditAction.LOGOUT},
+                    {"action": "not-an-action"}
+                ])
+            finally:
+                await sink.stop()
+        
+        assert asyncio.run(run()) == [True, False]
+        
+        logs = db_session.query(AuditLog).all()
+        assert sorted(log.action.value for log in logs) == ["file_download", "file_download", "logout"]
+    
+    def test_durable_actions_committed_before_return(self, db_session, monkeypatch):
+        """Test that auth failures are committed through the sink before log() returns"""
+        from app.services import audit_service as audit_module
+        
+        async def run():
+            # A long interval: only the waiting caller can trigger the flush
+            sink = AuditSink(flush_interval=60)
+            monkeypatch.setattr(audit_module, "audit_sink", sink)
+            await sink.start(TestingAsyncSessionLocal)
+            try:
+                async with TestingAsyncSessionLocal() as db:
+                    service = audit_module.AuditService(db)
+                    assert await service.log(AuditAction.LOGOUT) is None
+                    failed = await asyncio.wait_for(
+                        service.log(AuditAction.LOGIN_FAILED, status="failed"), 5
+                    )
+                    assert failed is None
+                
+                async with TestingAsyncSessionLocal() as db:
+                    result = await db.execute(select(AuditLog.action))
+                    return set(result.scalars().all())
+            finally:
+                await sink.stop()
+        
+        # The queued LOGOUT shares the durable entry's commit
+        assert asyncio.run(run()) == {AuditAction.LOGOUT, AuditAction.LOGIN_FAILED}
+    
+    def test_audit_sink_redis_queue(self, db_session):
+        """Test that the Redis-backed sink round-trips entries into the table"""
+        async def run():
+            redis = RedisClient()
+            redis.connect()
+            await redis.delete(AUDIT_QUEUE_KEY)
+            sink = AuditSink(batch_size=2, flush_interval=0.01)
+            await sink.start(TestingAsyncSessionLocal, redis=redis)
+            try:
+                for i in range(3):
+                    assert await sink.submit({
+                        "action": AuditAction.FILE_DOWNLOAD,
+                        "resource_type": "file",
+                        "resource_id": i,
+                        "status": "success"
+                    })
+            finally:
+                await sink.stop()
+                assert not await redis.exists(AUDIT_QUEUE_KEY)
+                await redis.close()
+        
+        asyncio.run(run())
+        
+        logs = db_session.query(AuditLog).order_by(AuditLog.id).all()
+        assert [log.resource_id for log in logs] == [0, 1, 2]
+        assert all(log.action == AuditAction.FILE_DOWNLOAD for log in logs)
+        assert all(log.created_at is not None for log in logs)
+    
+    def test_audit_sink_redis_requeues_failed_batch(self, db_session):
+        """Test that a failed Redis batch is retried and a malformed entry is skipped"""
+        async def run():
+            redis = RedisClient()
+            redis.connect()
+            await redis.delete(AUDIT_QUEUE_KEY)
+            await redis.push_json(AUDIT_QUEUE_KEY, {"action": "not-an-action"})
+            await redis.push_json(AUDIT_QUEUE_KEY, {
+                "action": AuditAction.FILE_DOWNLOAD.value,
+                "resource_id": 7,
+                "status": "success"
+            })
+            
+            sink = AuditSink(batch_size=10, flush_interval=0.01)
+            insert = sink._insert
+            attempts = []
+            
+            async def flaky_insert(batch):
+                attempts.append(len(batch))
+                return len(attempts) > 1 and await insert(batch)
+            
+            sink._insert = flaky_insert
+            await sink.start(TestingAsyncSessionLocal, redis=redis)
+            try:
+                for _ in range(100):
+                    if len(attempts) > 1:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                await sink.stop()
+                assert not await redis.exists(AUDIT_QUEUE_KEY)
+                await redis.close()
+            return attempts
+        
+        assert asyncio.run(run())[:2] == [1, 1]
+        
+        logs = db_session.query(AuditLog).all()
+        assert [log.resource_id for log in logs] == [7]
+    
+    def test_audit_logs_cursor_pagination(self, client, admin_token, user_token):
+        """Test that next_cursor walks the log without overlap"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = client.get("/api/v1/audit/?action=login_success&limit=1", headers=headers)
+        assert response.status_code == 200
+        first = response.json()
+        assert first["next_cursor"]
+        
+        response = client.get(
+            f"/api/v1/audit/?action=login_success&limit=1&cursor={first['next_cursor']}",
+            headers=headers
+        )
+        assert response.status_code == 200
+        second = response.json()
+        assert len(second["items"]) == 1
+        assert second["items"][0]["id"] < first["items"][0]["id"]
+        
+        response = client.get(
+            f"/api/v1/audit/?action=login_success&limit=1&cursor={second['next_cursor']}",
+            headers=headers
+        )
+        assert response.json()["items"] == []
+    
+    def test_audit_logs_invalid_cursor(self, client, admin_token):
+        """Test that a malformed cursor is rejected"""
+        response = client.get(
+            "/api/v1/audit/?cursor=not-a-cursor",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 400
@@ -26,6 +26,38 @@ class TestAuthEndpoints:
         assert "access_token" in data["tokens"]
         assert "refresh_token" in data["tokens"]
     
+    def test_register_does_not_reload_user(self, client):
+        """Test registration gets server defaults from the INSERT, not a reload"""
+        from sqlalchemy import event
+        from tests.conftest import async_engine
+        
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            response = client.post(
+                "/api/v1/auth/register",
+                json={
+                    "email": "onequery@example.com",
+                    "password": "Password123",
+                    "full_name": "One Query"
+                }
+            )
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        
+        assert response.status_code == 201
+        data = response.json()["user"]
+        assert data["role"]["name"] == "user"
+        assert data["created_at"] is not None
+        # Role id lookup (unless cached) and the role; no duplicate pre-check
+        assert not any("FROM users" in s for s in statements)
+        assert len(statements) <= 2
+    
     def test_register_duplicate_email(self, client, test_user):
         """Test registration with existing email"""
         response = client.post(
@@ -87,6 +119,44 @@ class TestAuthEndpoints:
         )
         assert response.status_code == 401
     
+    def test_login_nonexistent_user_checks_dummy_hash(self, client, monkeypatch):
+        """Test an unknown email still pays for a bcrypt check"""
+        from app.services import auth_service as auth_module
+        
+        checked = []
+        
+        async def record(password, hashed):
+            checked.append(hashed)
+            return False
+        
+        monkeypatch.setattr(auth_module, "verify_password_async", record)
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "noone@example.com", "password": "SomePassword123"}
+        )
+        assert response.status_code == 401
+        assert checked == [auth_module._DUMMY_PASSWORD_HASH]
+    
+    def test_login_rate_limited(self, client, monkeypatch):
+        """Test login is rate limited per client once the bucket is empty"""
+        from app.core.redis import redis_client
+        from app.security.dependencies import rate_limiter
+        
+        key = "rate_limit:testclient:/api/v1/auth/login"
+        monkeypatch.setattr(rate_limiter, "requests_per_minute", 2)
+        client.portal.call(redis_client.delete, key)
+        credentials = {"email": "noone@example.com", "password": "SomePassword123"}
+        
+        try:
+            statuses = [
+                client.post("/api/v1/auth/login", json=credentials).status_code
+                for _ in range(3)
+            ]
+        finally:
+            client.portal.call(redis_client.delete, key)
+        
+        assert statuses == [401, 401, 429]
+    
     def test_get_me(self, client, user_token):
         """Test get current user info"""
         response = client.get(
@@ -97,6 +167,29 @@ class TestAuthEndpoints:
         data = response.json()
         assert data["email"] == "testuser@example.com"
     
+    def test_get_me_loads_role_in_one_query(self, client, user_token):
+        """Test the auth dependency loads the user and role in a single SELECT"""
+        from sqlalchemy import event
+        from tests.conftest import async_engine
+        
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            response = client.get(
+                "/api/v1/auth/me",
+                headers={"Authorization": f"Bearer {user_token}"}
+            )
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        
+        assert response.status_code == 200
+        assert response.json()["role"]["name"] == "user"
+        assert len(statements) == 1
+    
     def test_get_me_unauthorized(self, client):
         """Test get me without token"""
         response = client.get("/api/v1/auth/me")
@@ -132,3 +225,53 @@ class TestAuthEndpoints:
         )
         assert response.status_code == 200
         assert response.json()["message"] == "Logged out successfully"
+
+
+class TestAccessTokenCache:
+    """Test the in-process verified access token cache"""
+    
+    def test_cached_token_verifies(self):
+        """Test a cached token verifies and is re-verified once forgotten"""
+        from app.security import jwt as jwt_module
+        
+        token = jwt_module.create_access_token({"sub": "1"})
+        assert jwt_module.verify_access_token(token)["sub"] == "1"
+        assert token in jwt_module._access_token_cache
+        
+        jwt_module.forget_access_token(token)
+        assert token not in jwt_module._access_token_cache
+        assert jwt_module.verify_access_token(token)["sub"] == "1"
+    
+    def test_refresh_token_rejected_as_access(self):
+        """Test a refresh token is never accepted or cached as an access token"""
+        from app.security import jwt as jwt_module
+        
+        token = jwt_module.create_refresh_token({"sub": "1"})
+        assert jwt_module.verify_access_token(token) is None
+        assert token not in jwt_module._access_token_cache
+
+
+class TestPasswordCache:
+    """Test the optional in-process successful password check cache"""
+    
+    def test_only_matches_are_cached(self, monkeypatch):
+        """Test a match is remembered and a mismatch is not"""
+        from app.core.config import settings
+        from app.security import password as password_module
+        
+        monkeypatch.setattr(settings, "PASSWORD_CACHE_SIZE", 10)
+        password_module.clear_password_cache()
+        hashed = password_module.hash_password("Password123")
+        
+        assert not password_module.verify_password("Wrong12345", hashed)
+        assert not password_module._verified_cache
+        
+        assert password_module.verify_password("Password123", hashed)
+        assert len(password_module._verified_cache) == 1
+        
+        # A hit must not skip bcrypt for a different hash of the same password
+        other = password_module.hash_password("Password123")
+        monkeypatch.setattr(password_module.bcrypt, "checkpw", lambda *args: False)
+        assert password_module.verify_password("Password123", hashed)
+        assert not password_module.verify_password("Password123", other)
+        password_module.clear_password_cache()
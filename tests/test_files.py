@@ -4,8 +4,13 @@ Uses mocked S3 service
 """
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+import hashlib
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from io import BytesIO
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.core.s3 import s3_service, UPLOAD_PART_SIZE
 
 
 class TestFileEndpoints:
@@ -15,7 +20,7 @@ class TestFileEndpoints:
     def test_upload_file(self, mock_s3, client, user_token):
         """Test file upload"""
         # Mock S3 upload
-        mock_s3.upload_file.return_value = True
+        mock_s3.upload_chunks = AsyncMock(return_value=True)
         
         # Create test file
         file_content = b"Test file content"
@@ -33,6 +38,56 @@ class TestFileEndpoints:
         # In real tests, use moto for full S3 mocking
         assert response.status_code in [201, 500]  # 500 if S3 not mocked properly
     
+    def test_upload_large_file_uses_multipart(self, client, user_token):
+        """Test that a file larger than one part streams as a multipart upload"""
+        mock_client = MagicMock()
+        mock_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        mock_client.upload_part.side_effect = lambda **kw: {"ETag": f"etag-{kw['PartNumber']}"}
+        # More parts than are uploaded at once, to cover the in-flight window
+        file_content = b"x" * (UPLOAD_PART_SIZE * 4 + 1024)
+        
+        with patch.object(s3_service, "_client", mock_client):
+            response = client.post(
+                "/api/v1/files/upload",
+                files={"file": ("big.bin", BytesIO(file_content), "application/octet-stream")},
+                headers={"Authorization": f"Bearer {user_token}"}
+            )
+        
+        assert response.status_code == 201
+        assert response.json()["size"] == len(file_content)
+        assert response.json()["checksum_sha256"] == hashlib.sha256(file_content).hexdigest()
+        assert mock_client.upload_part.call_count == 5
+        mock_client.complete_multipart_upload.assert_called_once()
+        parts = mock_client.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Parts"]
+        assert parts == [
+            {"ETag": f"etag-{number}", "PartNumber": number}
+            for number in range(1, 6)
+        ]
+        mock_client.put_object.assert_not_called()
+    
+    def test_upload_failed_part_aborts_multipart(self, client, user_token):
+        """Test that a rejected part aborts the multipart upload"""
+        mock_client = MagicMock()
+        mock_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        mock_client.upload_part.side_effect = ClientError(
+            {"Error": {"Code": "InternalError", "Message": "boom"}}, "UploadPart"
+        )
+        
+        with patch.object(s3_service, "_client", mock_client):
+            response = client.post(
+                "/api/v1/files/upload",
+                files={"file": ("big.bin", BytesIO(b"x" * (UPLOAD_PART_SIZE + 1)), "application/octet-stream")},
+                headers={"Authorization": f"Bearer {user_token}"}
+            )
+        
+        assert response.status_code == 500
+        mock_client.abort_multipart_upload.assert_called_once_with(
+            Bucket=s3_service.bucket_name,
+            Key=mock_client.create_multipart_upload.call_args.kwargs["Key"],
+            UploadId="upload-1"
+        )
+        mock_client.complete_multipart_upload.assert_not_called()
+    
     def test_list_my_files(self, client, user_token):
         """Test listing user's files"""
         response = client.get(
@@ -80,6 +135,96 @@ class TestFileEndpoints:
         assert "total_size" in data
         assert "total_shared" in data
     
+    def test_get_file_stats_counts_owned_files(self, client, user_token, test_file):
+        """Test that file statistics aggregate the user's files"""
+        response = client.get(
+            "/api/v1/files/stats",
+            headers={"Authorization": f"Bearer {user_token}"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "total_files": 1,
+            "total_size": 1024,
+            "total_shared": 0
+        }
+    
+    @patch('app.services.file_service.s3_service')
+    def test_download_file_redirects_to_presigned_url(
+        self, mock_s3, client, user_token, test_file, presigned_downloads
+    ):
+        """Test that downloads redirect to a presigned S3 URL"""
+        mock_s3.generate_presigned_url.return_value = "https://s3.example.com/signed"
+        
+        response = client.get(
+            f"/api/v1/files/{test_file.id}/download",
+            headers={"Authorization": f"Bearer {user_token}"},
+            follow_redirects=False
+        )
+        assert response.status_code == 307
+        assert response.headers["location"] == "https://s3.example.com/signed"
+        mock_s3.generate_presigned_url.assert_called_once_with(
+            test_file.s3_key, test_file.original_filename, test_file.content_type
+        )
+    
+    @patch('app.services.file_service.s3_service')
+    def test_get_download_url(self, mock_s3, client, user_token, test_file):
+        """Test that the presigned URL can be fetched as JSON"""
+        mock_s3.generate_presigned_url.return_value = "https://s3.example.com/signed"
+        
+        response = client.get(
+            f"/api/v1/files/{test_file.id}/download-url",
+            headers={"Authorization": f"Bearer {user_token}"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "url": "https://s3.example.com/signed",
+            "expires_in": settings.S3_PRESIGNED_URL_EXPIRE_SECONDS
+        }
+    
+    @patch('app.services.file_service.s3_service')
+    def test_download_file_streams_chunks(self, mock_s3, client, user_token, test_file, monkeypatch):
+        """Test that downloads stream S3 chunks with a Content-Length"""
+        monkeypatch.setattr(settings, "S3_PRESIGNED_DOWNLOADS", False)
+        
+        async def chunks():
+            yield b"a" * 1000
+            yield b"b" * 24
+        
+        mock_s3.get_file_chunks = AsyncMock(return_value=chunks())
+        
+        response = client.get(
+            f"/api/v1/files/{test_file.id}/download",
+            headers={"Authorization": f"Bearer {user_token}"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-length"] == "1024"
+        assert response.content == b"a" * 1000 + b"b" * 24
+        mock_s3.get_file_chunks.assert_awaited_once_with(test_file.s3_key, 1024)
+    
+    def test_get_file_requires_permission(
+        self, client, user_token, other_user, other_user_token, test_file
+    ):
+        """Test that a non-owner can view a file only once granted access"""
+        response = client.get(
+            f"/api/v1/files/{test_file.id}",
+            headers={"Authorization": f"Bearer {other_user_token}"}
+        )
+        assert response.status_code == 403
+        
+        response = client.post(
+            f"/api/v1/files/{test_file.id}/permissions",
+            json={"user_id": other_user.id},
+            headers={"Authorization": f"Bearer {user_token}"}
+        )
+        assert response.status_code == 201
+        
+        response = client.get(
+            f"/api/v1/files/{test_file.id}",
+            headers={"Authorization": f"Bearer {other_user_token}"}
+        )
+        assert response.status_code == 200
+        assert response.json()["owner_email"] == "testuser@example.com"
+    
     def test_get_nonexistent_file(self, client, user_token):
         """Test getting non-existent file"""
         response = client.get(
@@ -100,3 +245,40 @@ class TestFileEndpoints:
         """Test file access without authentication"""
         response = client.get("/api/v1/files/")
         assert response.status_code == 403
+    
+    def test_list_permissions_includes_user_email(self, client, user_token, test_file, test_admin):
+        """Test that listed permissions carry the grantee's email"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        response = client.post(
+            f"/api/v1/files/{test_file.id}/permissions",
+            json={"user_id": test_admin.id},
+            headers=headers
+        )
+        assert response.status_code == 201
+        
+        response = client.get(
+            f"/api/v1/files/{test_file.id}/permissions",
+            headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["user_email"] == "admin@example.com"
+    
+    def test_regrant_permission_updates_existing(self, client, user_token, test_file, test_admin):
+        """Test that granting again updates the existing grant in place"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        url = f"/api/v1/files/{test_file.id}/permissions"
+        first = client.post(url, json={"user_id": test_admin.id}, headers=headers)
+        second = client.post(
+            url,
+            json={"user_id": test_admin.id, "can_download": False, "can_share": True},
+            headers=headers
+        )
+        assert first.status_code == 201 and second.status_code == 201
+        assert second.json()["id"] == first.json()["id"]
+        
+        data = client.get(url, headers=headers).json()
+        assert len(data) == 1
+        assert data[0]["can_download"] is False
+        assert data[0]["can_share"] is True
@@ -16,6 +16,21 @@ class TestHealthEndpoints:
         assert data["status"] == "healthy"
         assert "version" in data
         assert "timestamp" in data
+        assert float(response.headers["X-Process-Time"]) >= 0
+    
+    def test_no_cors_without_origins(self, client):
+        """Test CORS headers are not sent when no origins are configured"""
+        response = client.get("/api/v1/health", headers={"Origin": "https://evil.example"})
+        assert response.status_code == 200
+        assert "access-control-allow-origin" not in response.headers
+    
+    def test_detailed_health_check(self, client):
+        """Test detailed health check reports database status"""
+        response = client.get("/api/v1/health/detailed")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["services"]["database"]["status"] == "healthy"
+        assert "redis" in data["services"]
     
     def test_root_endpoint(self, client):
         """Test root endpoint"""
@@ -25,3 +40,10 @@ class TestHealthEndpoints:
         assert "name" in data
         assert "version" in data
         assert "docs" in data
+    
+    def test_openapi_schema(self, client):
+        """Test the OpenAPI schema documents list endpoints rendered outside response_model"""
+        response = client.get("/api/v1/openapi.json")
+        assert response.status_code == 200
+        schema = response.json()["paths"]["/api/v1/files/"]["get"]["responses"]["200"]
+        assert schema["content"]["application/json"]["schema"]["type"] == "array"
@@ -71,3 +71,138 @@ class TestShareEndpoints:
             headers={"Authorization": f"Bearer {user_token}"}
         )
         assert response.status_code == 422
+    
+    def test_list_my_share_links_includes_filename(self, client, user_token, test_file):
+        """Test that listed share links carry the shared file's name"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        response = client.post(
+            "/api/v1/share/",
+            json={"file_id": test_file.id, "expiry_minutes": 60, "password": "s3cret"},
+            headers=headers
+        )
+        assert response.status_code == 201
+        
+        response = client.get("/api/v1/share/", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["filename"] == "report.pdf"
+        assert data[0]["has_password"] is True
+    
+    @patch('app.api.v1.endpoints.share.s3_service')
+    def test_download_restricted_share_link_with_token(
+        self, mock_s3, client, user_token, test_file, presigned_downloads
+    ):
+        """Test that a user-restricted link accepts the allowed user's bearer token"""
+        mock_s3.generate_presigned_url.return_value = "https://s3.example.com/signed"
+        headers = {"Authorization": f"Bearer {user_token}"}
+        response = client.post(
+            "/api/v1/share/",
+            json={
+                "file_id": test_file.id,
+                "expiry_minutes": 60,
+                "requires_auth": True,
+                "allowed_email": "testuser@example.com"
+            },
+            headers=headers
+        )
+        assert response.status_code == 201
+        token = response.json()["token"]
+        
+        response = client.get(f"/api/v1/share/{token}/download", follow_redirects=False)
+        assert response.status_code == 401
+        
+        response = client.get(
+            f"/api/v1/share/{token}/download",
+            headers=headers,
+            follow_redirects=False
+        )
+        assert response.status_code == 307
+        assert response.headers["location"] == "https://s3.example.com/signed"
+    
+    def test_restricted_share_link_rejects_deactivated_user(
+        self, client, user_token, test_user, test_file, db_session
+    ):
+        """Test that a still-valid token of a deactivated user is rejected"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        response = client.post(
+            "/api/v1/share/",
+            json={
+                "file_id": test_file.id,
+                "expiry_minutes": 60,
+                "requires_auth": True,
+                "allowed_email": "testuser@example.com"
+            },
+            headers=headers
+        )
+        token = response.json()["token"]
+        
+        test_user.is_active = False
+        db_session.commit()
+        
+        response = client.get(
+            f"/api/v1/share/{token}/download",
+            headers=headers,
+            follow_redirects=False
+        )
+        assert response.status_code == 403
+    
+    @patch('app.api.v1.endpoints.share.s3_service')
+    def test_download_limit_enforced(
+        self, mock_s3, client, user_token, test_file, presigned_downloads
+    ):
+        """Test that downloads beyond max_downloads are rejected"""
+        mock_s3.generate_presigned_url.return_value = "https://s3.example.com/signed"
+        response = client.post(
+            "/api/v1/share/",
+            json={"file_id": test_file.id, "expiry_minutes": 60, "max_downloads": 1},
+            headers={"Authorization": f"Bearer {user_token}"}
+        )
+        assert response.status_code == 201
+        token = response.json()["token"]
+        
+        response = client.get(f"/api/v1/share/{token}/download", follow_redirects=False)
+        assert response.status_code == 307
+        
+        response = client.get(f"/api/v1/share/{token}/download", follow_redirects=False)
+        assert response.status_code == 403
+    
+    @patch('app.api.v1.endpoints.share.s3_service')
+    def test_download_count_mirrored_to_database(
+        self, mock_s3, client, user_token, test_file, db_session, presigned_downloads
+    ):
+        """Test that each download increments the stored download_count"""
+        from app.models.share_link import ShareLink
+        
+        mock_s3.generate_presigned_url.return_value = "https://s3.example.com/signed"
+        response = client.post(
+            "/api/v1/share/",
+            json={"file_id": test_file.id, "expiry_minutes": 60},
+            headers={"Authorization": f"Bearer {user_token}"}
+        )
+        token = response.json()["token"]
+        
+        for _ in range(3):
+            response = client.get(f"/api/v1/share/{token}/download", follow_redirects=False)
+            assert response.status_code == 307
+        
+        link = db_session.query(ShareLink).filter(ShareLink.token == token).one()
+        assert link.download_count == 3
+
+
+class TestShareLinkModel:
+    """Test share link expiry checks"""
+    
+    def test_expiry_naive_and_aware(self):
+        """Test naive expiry times are treated as UTC, like aware ones"""
+        from datetime import datetime, timedelta, timezone
+        from app.models.share_link import ShareLink
+        
+        now = datetime.now(timezone.utc)
+        for expires_at in (now + timedelta(minutes=5), (now + timedelta(minutes=5)).replace(tzinfo=None)):
+            link = ShareLink(expires_at=expires_at, is_active=True, download_count=0)
+            assert not link.is_expired
+            assert link.is_valid
+            assert link.is_expired_at(now.timestamp() + 600)
+        
+        assert ShareLink(expires_at=None).is_expired
@@ -4,6 +4,11 @@ User Management API Tests
 
 import pytest
 
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.security.user_cache import USER_CACHE_PREFIX, invalidate_user
+from app.services.role_cache import ROLES_CACHE_KEY, invalidate_roles
+
 
 class TestUserEndpoints:
     """Test user management endpoints"""
@@ -18,6 +23,11 @@ class TestUserEndpoints:
         data = response.json()
         assert isinstance(data, list)
         assert len(data) >= 1
+        listed = next(u for u in data if u["email"] == test_user.email)
+        assert listed["role_name"] == "user"
+        assert set(listed) == {
+            "id", "email", "full_name", "is_active", "role_name", "created_at"
+        }
     
     def test_list_users_as_regular_user(self, client, user_token):
         """Test that regular user cannot list users"""
@@ -36,6 +46,8 @@ class TestUserEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert data["email"] == test_user.email
+        assert data["role"]["name"] == "user"
+        assert "hashed_password" not in data
     
     def test_update_me(self, client, user_token):
         """Test updating current user's profile"""
@@ -84,6 +96,51 @@ class TestUserEndpoints:
             headers={"Authorization": f"Bearer {admin_token}"}
         )
         assert response.status_code == 200
+        assert response.json()["role"]["name"] == "admin"
+    
+    def test_assign_unknown_role(self, client, admin_token, test_user):
+        """Test assigning a role id that does not exist"""
+        response = client.put(
+            f"/api/v1/users/{test_user.id}/role",
+            json={"role_id": 999},
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Role not found"
+    
+    def test_role_change_invalidates_cached_user(
+        self, client, admin_token, user_token, test_user, test_admin, db_session, monkeypatch
+    ):
+        """Test that the cached auth user is dropped when its role changes"""
+        from app.models.role import Role
+        monkeypatch.setattr(settings, "USER_CACHE_TTL_SECONDS", 30)
+        client.portal.call(invalidate_user, test_user.id)
+        headers = {"Authorization": f"Bearer {user_token}"}
+        
+        try:
+            response = client.get("/api/v1/auth/me", headers=headers)
+            assert response.status_code == 200
+            assert response.json()["role"]["name"] == "user"
+            assert client.portal.call(redis_client.exists, f"{USER_CACHE_PREFIX}{test_user.id}")
+            
+            # Served from the cache on the next request
+            response = client.get("/api/v1/users/", headers=headers)
+            assert response.status_code == 403
+            
+            admin_role = db_session.query(Role).filter(Role.name == "admin").first()
+            response = client.put(
+                f"/api/v1/users/{test_user.id}/role",
+                json={"role_id": admin_role.id},
+                headers={"Authorization": f"Bearer {admin_token}"}
+            )
+            assert response.status_code == 200
+            assert not client.portal.call(redis_client.exists, f"{USER_CACHE_PREFIX}{test_user.id}")
+            
+            response = client.get("/api/v1/users/", headers=headers)
+            assert response.status_code == 200
+        finally:
+            client.portal.call(invalidate_user, test_user.id)
+            client.portal.call(invalidate_user, test_admin.id)
     
     def test_deactivate_user(self, client, admin_token, test_user):
         """Test deactivating a user"""
@@ -107,3 +164,30 @@ class TestUserEndpoints:
         assert "admin" in role_names
         assert "user" in role_names
         assert "viewer" in role_names
+    
+    def test_list_roles_cached_until_role_created(self, client, admin_token, monkeypatch):
+        """Test that the role listing is cached and dropped when a role is added"""
+        monkeypatch.setattr(settings, "ROLES_CACHE_TTL_SECONDS", 60)
+        client.portal.call(invalidate_roles)
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        
+        try:
+            response = client.get("/api/v1/users/roles/list", headers=headers)
+            assert response.status_code == 200
+            assert client.portal.call(redis_client.exists, ROLES_CACHE_KEY)
+            assert response.json() == client.get(
+                "/api/v1/users/roles/list", headers=headers
+            ).json()
+            
+            response = client.post(
+                "/api/v1/users/roles",
+                json={"name": "auditor", "description": "Reads audit logs"},
+                headers=headers
+            )
+            assert response.status_code == 201
+            assert not client.portal.call(redis_client.exists, ROLES_CACHE_KEY)
+            
+            response = client.get("/api/v1/users/roles/list", headers=headers)
+            assert "auditor" in [r["name"] for r in response.json()]
+        finally:
+            client.portal.call(invalidate_roles)